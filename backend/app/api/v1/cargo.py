@@ -1,7 +1,10 @@
-from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
 import asyncio
 
 from ...services.cargo_service import cargo_service
+from ...services.tracking_hub import TrackingSubscription, tracking_hub
 
 router = APIRouter(prefix="/cargo", tags=["Cargo Tracking"])
 
@@ -21,6 +24,16 @@ async def list_shipments():
     return await cargo_service.get_all_shipments()
 
 
+@router.get("/fleet")
+async def get_fleet(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=1000),
+    status: Optional[str] = None,
+):
+    """Page through live positions for the whole fleet, optionally filtered by status"""
+    return await cargo_service.get_fleet_page(page=page, page_size=page_size, status=status)
+
+
 @router.get("/search")
 async def search_shipments(q: str):
     """Search shipments by container ID, B/L, or vessel name"""
@@ -31,37 +44,34 @@ async def search_shipments(q: str):
 
 @router.websocket("/ws/track/{container_id}")
 async def websocket_tracking(websocket: WebSocket, container_id: str):
-    """Real-time tracking updates via WebSocket"""
+    """Real-time tracking updates via WebSocket, shared across viewers of a container"""
     await websocket.accept()
 
     try:
-        while True:
-            # Get updated position
-            result = await cargo_service.track_shipment(container_id)
-
-            if result:
-                # Send position update
-                await websocket.send_json(
-                    {
-                        "type": "position_update",
-                        "data": {
-                            "container_id": result.shipment.container_id,
-                            "latitude": result.current_position.latitude,
-                            "longitude": result.current_position.longitude,
-                            "location_name": result.current_position.location_name,
-                            "speed_knots": result.current_position.speed_knots,
-                            "heading": result.current_position.heading,
-                            "progress_percent": result.progress_percent,
-                            "eta": result.shipment.eta.isoformat(),
-                            "timestamp": result.current_position.timestamp.isoformat(),
-                        },
-                    }
-                )
-
-            # Update every 10 seconds (simulated real-time)
-            await asyncio.sleep(10)
+        async with tracking_hub.subscribe(container_id) as subscription:
+            sender = asyncio.create_task(_send_updates(websocket, subscription))
+            receiver = asyncio.create_task(_wait_for_disconnect(websocket))
+            done, pending = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for task in done:
+                task.result()
 
     except WebSocketDisconnect:
         pass
     except Exception:
         await websocket.close(code=1000)
+
+
+async def _send_updates(websocket: WebSocket, subscription: TrackingSubscription) -> None:
+    while True:
+        await websocket.send_json(await subscription.get())
+
+
+async def _wait_for_disconnect(websocket: WebSocket) -> None:
+    # Client messages are ignored; reading them is how a disconnect is noticed between ticks.
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
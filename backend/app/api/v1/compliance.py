@@ -1,7 +1,14 @@
-from fastapi import APIRouter, File, Form, UploadFile
+from typing import Optional
+
+from fastapi import APIRouter, File, Form, Header, UploadFile
+from fastapi.responses import StreamingResponse
 
 from ...services.compliance_document_service import compliance_document_service
-from ...services.compliance_service import compliance_service, ComplianceRequest
+from ...services.compliance_service import (
+    compliance_service,
+    ComplianceRequest,
+    PortfolioComplianceRequest,
+)
 
 router = APIRouter(prefix="/compliance", tags=["Compliance"])
 
@@ -11,6 +18,22 @@ async def check_compliance(request: ComplianceRequest):
     return await compliance_service.check_compliance(request)
 
 
+@router.post("/portfolio")
+async def check_portfolio_compliance(request: PortfolioComplianceRequest):
+    """Evaluate every line of a purchase order and return per-line results plus a risk report."""
+    return await compliance_service.check_portfolio(request)
+
+
+@router.post("/screen/batch")
+async def screen_counterparties_batch(file: UploadFile = File(...)):
+    """Screen a CSV/NDJSON list of counterparties, streaming NDJSON results."""
+    names = await compliance_service.read_screening_upload(file)
+    return StreamingResponse(
+        compliance_service.screen_entities_stream(names),
+        media_type="application/x-ndjson",
+    )
+
+
 @router.post("/documents/upload")
 async def upload_compliance_document(
     compliance_case_id: str = Form(...),
@@ -28,3 +51,27 @@ async def upload_compliance_document(
 async def get_compliance_documents(compliance_case_id: str):
     documents = await compliance_document_service.get_document_statuses(compliance_case_id)
     return {"compliance_case_id": compliance_case_id, "documents": documents}
+
+
+@router.get("/documents/{compliance_case_id}/export")
+async def export_compliance_documents(compliance_case_id: str):
+    """Stream a zip of every uploaded document in the case."""
+    return await compliance_document_service.export_case_archive(compliance_case_id)
+
+
+@router.get("/documents/{compliance_case_id}/{document_name}/content")
+async def download_compliance_document(
+    compliance_case_id: str,
+    document_name: str,
+    range_header: Optional[str] = Header(default=None, alias="Range"),
+    if_none_match: Optional[str] = Header(default=None),
+    if_range: Optional[str] = Header(default=None),
+):
+    """Stream one document's content; supports Range, If-Range and If-None-Match."""
+    return await compliance_document_service.document_response(
+        compliance_case_id,
+        document_name,
+        range_header=range_header,
+        if_none_match=if_none_match,
+        if_range=if_range,
+    )
@@ -1,6 +1,8 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 
 from ...core.database import get_mongo, get_redis
+from ...core.scheduler import scheduler
 
 router = APIRouter()
 
@@ -10,6 +12,24 @@ async def health_check():
     return {"status": "healthy", "service": "main-backend"}
 
 
+@router.get("/health/live")
+async def liveness_check():
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+async def readiness_check():
+    """503 until every cache warmup job has completed its first run."""
+    stats = scheduler.stats()
+    jobs = {
+        name: {"last_success_at": job["last_success_at"], "last_error": job["last_error"]}
+        for name, job in stats["jobs"].items()
+        if job["warmup"]
+    }
+    payload = {"status": "ready" if stats["ready"] else "warming", "jobs": jobs}
+    return JSONResponse(payload, status_code=200 if stats["ready"] else 503)
+
+
 @router.get("/health/detailed")
 async def detailed_health():
     checks = {
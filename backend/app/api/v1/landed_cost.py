@@ -1,6 +1,11 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
-from ...services.landed_cost_service import landed_cost_service, LandedCostRequest
+from ...services.landed_cost_service import (
+    landed_cost_service,
+    LandedCostRequest,
+    ScenarioSweepRequest,
+)
 
 router = APIRouter(prefix="/landed-cost", tags=["Landed Cost"])
 
@@ -8,3 +13,45 @@ router = APIRouter(prefix="/landed-cost", tags=["Landed Cost"])
 @router.post("/calculate")
 async def calculate_landed_cost(request: LandedCostRequest):
     return await landed_cost_service.calculate(request)
+
+
+@router.post("/scenarios")
+async def sweep_landed_cost_scenarios(request: ScenarioSweepRequest):
+    """Rank landed cost across origins x shipping modes x quantity tiers."""
+    return await landed_cost_service.sweep_scenarios(request)
+
+
+@router.post("/calculate/batch")
+async def calculate_landed_cost_batch(request: Request, format: str = "ndjson"):
+    """Price a JSON list (or {"items": [...]}) or an uploaded CSV of requests.
+
+    Rows stream back as NDJSON (default) or CSV with per-row warnings.
+    """
+    output_format = format.strip().lower()
+    if output_format not in {"ndjson", "csv"}:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Multipart batch requires a 'file' field")
+        rows = await landed_cost_service.read_batch_upload(upload)
+    else:
+        try:
+            payload = await request.json()
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail="Body must be JSON or a CSV upload") from exc
+        rows = payload.get("items") if isinstance(payload, dict) else payload
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="Body must be a list of landed-cost requests")
+
+    items = landed_cost_service.parse_batch_rows(rows)
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch contains no rows")
+
+    return StreamingResponse(
+        landed_cost_service.calculate_batch_stream(items, output_format),
+        media_type="text/csv" if output_format == "csv" else "application/x-ndjson",
+    )
@@ -3,6 +3,15 @@ import httpx
 from datetime import datetime
 import os
 
+from ...core.cache import shared_cache
+from ...core.http_client import upstream_http
+from ...core.scheduler import scheduler
+from ...services.cargo_service import cargo_service
+from ...services.compliance_service import compliance_service
+from ...services.live_data_service import live_data_service
+from ...services.marine_weather import marine_weather
+from ...services.tracking_hub import tracking_hub
+
 try:
     import psutil
 except Exception:  # pragma: no cover - optional dependency
@@ -64,3 +73,53 @@ async def get_metrics():
         "memory": psutil.virtual_memory()._asdict(),
         "disk": psutil.disk_usage("/")._asdict(),
     }
+
+
+@router.get("/upstreams")
+async def get_upstream_stats():
+    """Connection reuse and error counters for pooled upstream HTTP clients."""
+    return upstream_http.stats()
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """Hit/miss counters for the local LRU and shared Redis cache tiers."""
+    return {
+        **shared_cache.stats(),
+        "compliance_results": compliance_service.get_result_cache_stats(),
+        "cargo_geometry": cargo_service.get_cache_stats(),
+        "weather_tiles": marine_weather.stats(),
+    }
+
+
+@router.get("/hts")
+async def get_hts_index_stats():
+    """Release label, row count and load time of the local HTS tariff index."""
+    return live_data_service.get_hts_index_stats()
+
+
+@router.get("/coalescing")
+async def get_coalescing_stats():
+    """How many concurrent upstream lookups were served by an in-flight fetch."""
+    return live_data_service.get_singleflight_stats()
+
+
+@router.get("/breakers")
+async def get_breaker_states():
+    """Per-upstream circuit breaker state and the negative-result cache."""
+    return {
+        "breakers": upstream_http.breaker_stats(),
+        "negative_cache": live_data_service.get_negative_cache_stats(),
+    }
+
+
+@router.get("/scheduler")
+async def get_scheduler_stats():
+    """Per-job last run, duration and error for the background cache scheduler."""
+    return scheduler.stats()
+
+
+@router.get("/tracking")
+async def get_tracking_stats():
+    """Watched containers with their subscriber counts, ticks and dropped updates."""
+    return tracking_hub.stats()
@@ -0,0 +1,275 @@
+import asyncio
+import base64
+import json
+import logging
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from contextlib import suppress
+from typing import Any, Awaitable, Callable, Optional
+
+from .config import env_int
+from .database import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class TieredCache:
+    """In-process LRU in front of Redis, shared by every uvicorn worker.
+
+    Keys are namespaced as ``<namespace>:v<version>:<source>:<key>`` so a
+    schema change only needs a version bump. Values are JSON, zlib-compressed
+    above a small threshold and base64-encoded because the shared client uses
+    ``decode_responses=True``. Writes and invalidations are broadcast on a
+    pub/sub channel so other workers drop their local copies. When Redis is
+    unavailable the cache degrades to the local tier only.
+    """
+
+    NAMESPACE = "tradeopt"
+    VERSION = 1
+    CHANNEL = "tradeopt:cache:invalidate"
+    COMPRESS_MIN_BYTES = 512
+    MAX_LOCAL_ENTRIES = 4096
+    # Local copies are bounded so a missed invalidation cannot pin stale data.
+    MAX_LOCAL_TTL_SECONDS = 300
+
+    # Default Redis TTL per data source (seconds); override with CACHE_TTL_<SOURCE>.
+    SOURCE_TTLS = {
+        "ofac": 24 * 60 * 60,
+        "section_301": 24 * 60 * 60,
+        "country_geo": 7 * 24 * 60 * 60,
+        "hts": 7 * 24 * 60 * 60,
+        "fx": 15 * 60,
+        "weather": 30 * 60,
+    }
+    DEFAULT_TTL_SECONDS = 60 * 60
+    # After a Redis error, skip the shared tier for this long instead of retrying every call.
+    REDIS_BACKOFF_SECONDS = 30.0
+
+    def __init__(self, redis=None) -> None:
+        self._redis = redis
+        self._local: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._listeners: dict[str, list[Callable[[Optional[str]], Awaitable[None] | None]]] = {}
+        self._instance_id = uuid.uuid4().hex
+        self._redis_retry_at = 0.0
+        # Read once; ttl() runs on every cache write.
+        self._ttls = {
+            source: env_int(f"CACHE_TTL_{source.upper()}", ttl, minimum=1)
+            for source, ttl in self.SOURCE_TTLS.items()
+        }
+        self._stats = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "invalidations_sent": 0,
+            "invalidations_received": 0,
+            "redis_errors": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self._redis is not None and time.monotonic() >= self._redis_retry_at
+
+    def key(self, source: str, key: str) -> str:
+        return f"{self.NAMESPACE}:v{self.VERSION}:{source}:{key}"
+
+    def ttl(self, source: str) -> int:
+        ttl = self._ttls.get(source)
+        if ttl is None:
+            ttl = self._ttls[source] = env_int(f"CACHE_TTL_{source.upper()}", self.DEFAULT_TTL_SECONDS, minimum=1)
+        return ttl
+
+    async def get(self, source: str, key: str) -> Any:
+        """Return the cached value from the local tier, then Redis; None on a miss."""
+        full_key = self.key(source, key)
+        local = self._local.get(full_key)
+        if local is not None:
+            expires_at, value = local
+            if expires_at > time.monotonic():
+                self._local.move_to_end(full_key)
+                self._stats["local_hits"] += 1
+                return value
+            self._local.pop(full_key, None)
+
+        if not self.enabled:
+            self._stats["misses"] += 1
+            return None
+
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                raw, remaining = await pipe.get(full_key).ttl(full_key).execute()
+        except Exception as exc:
+            self._redis_error("get", exc)
+            self._stats["misses"] += 1
+            return None
+
+        if raw is None:
+            self._stats["misses"] += 1
+            return None
+
+        try:
+            value = self._decode(raw)
+        except Exception as exc:
+            logger.warning("Dropping undecodable cache entry %s: %s", full_key, exc)
+            self._stats["misses"] += 1
+            return None
+
+        self._stats["redis_hits"] += 1
+        self._store_local(full_key, value, remaining if remaining > 0 else self.ttl(source))
+        return value
+
+    async def set(self, source: str, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Write through both tiers and tell other workers to drop their local copy."""
+        full_key = self.key(source, key)
+        ttl = ttl or self.ttl(source)
+        self._store_local(full_key, value, ttl)
+        self._stats["writes"] += 1
+        if not self.enabled:
+            return
+
+        try:
+            await self._redis.set(full_key, self._encode(value), ex=ttl)
+        except Exception as exc:
+            self._redis_error("set", exc)
+            return
+        await self._publish(source, key)
+
+    async def get_or_load(
+        self,
+        source: str,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+    ) -> Any:
+        """Return a cached value, or await loader() and cache a non-None result."""
+        value = await self.get(source, key)
+        if value is not None:
+            return value
+        value = await loader()
+        if value is not None:
+            await self.set(source, key, value, ttl=ttl)
+        return value
+
+    async def invalidate(self, source: str, key: Optional[str] = None) -> None:
+        """Drop one key, or a whole source when key is None, on every worker."""
+        self._drop_local(source, key)
+        if not self.enabled:
+            return
+
+        try:
+            if key is not None:
+                await self._redis.delete(self.key(source, key))
+            else:
+                pattern = self.key(source, "*")
+                async for item in self._redis.scan_iter(match=pattern, count=500):
+                    await self._redis.delete(item)
+        except Exception as exc:
+            self._redis_error("invalidate", exc)
+            return
+        await self._publish(source, key)
+
+    def on_invalidate(
+        self,
+        source: str,
+        callback: Callable[[Optional[str]], Awaitable[None] | None],
+    ) -> None:
+        """Register a hook run when another worker writes or invalidates a source."""
+        self._listeners.setdefault(source, []).append(callback)
+
+    async def run_invalidation_listener(self) -> None:
+        """Consume the invalidation channel; meant to run as a lifespan background task."""
+        if self._redis is None:
+            return
+
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    await self._handle_invalidation(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self._redis_error("subscribe", exc)
+                await asyncio.sleep(5.0)
+            finally:
+                with suppress(Exception):
+                    await pubsub.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "redis_configured": self._redis is not None,
+            "redis_available": self.enabled,
+            "local_entries": len(self._local),
+            **self._stats,
+        }
+
+    async def _handle_invalidation(self, data) -> None:
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        if message.get("origin") == self._instance_id:
+            return
+
+        source = str(message.get("source") or "")
+        key = message.get("key")
+        self._stats["invalidations_received"] += 1
+        self._drop_local(source, key)
+        for callback in self._listeners.get(source, []):
+            try:
+                result = callback(key)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as exc:
+                logger.warning("Cache invalidation hook failed for %s: %s", source, exc)
+
+    async def _publish(self, source: str, key: Optional[str]) -> None:
+        message = json.dumps({"origin": self._instance_id, "source": source, "key": key})
+        try:
+            await self._redis.publish(self.CHANNEL, message)
+            self._stats["invalidations_sent"] += 1
+        except Exception as exc:
+            self._redis_error("publish", exc)
+
+    def _store_local(self, full_key: str, value: Any, ttl: int) -> None:
+        expires_at = time.monotonic() + min(ttl, self.MAX_LOCAL_TTL_SECONDS)
+        self._local[full_key] = (expires_at, value)
+        self._local.move_to_end(full_key)
+        while len(self._local) > self.MAX_LOCAL_ENTRIES:
+            self._local.popitem(last=False)
+
+    def _drop_local(self, source: str, key: Optional[str]) -> None:
+        if key is not None:
+            self._local.pop(self.key(source, key), None)
+            return
+        prefix = self.key(source, "")
+        for full_key in [item for item in self._local if item.startswith(prefix)]:
+            self._local.pop(full_key, None)
+
+    def _encode(self, value: Any) -> str:
+        payload = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        if len(payload) < self.COMPRESS_MIN_BYTES:
+            return "j:" + payload.decode("utf-8")
+        return "z:" + base64.b64encode(zlib.compress(payload, 6)).decode("ascii")
+
+    def _decode(self, raw: str) -> Any:
+        if raw.startswith("z:"):
+            return json.loads(zlib.decompress(base64.b64decode(raw[2:])))
+        if raw.startswith("j:"):
+            return json.loads(raw[2:])
+        raise ValueError("unknown cache encoding")
+
+    def _redis_error(self, operation: str, exc: Exception) -> None:
+        self._stats["redis_errors"] += 1
+        if time.monotonic() >= self._redis_retry_at:
+            logger.warning("Redis cache %s failed, using local tier only for %.0fs: %s",
+                           operation, self.REDIS_BACKOFF_SECONDS, exc)
+        self._redis_retry_at = time.monotonic() + self.REDIS_BACKOFF_SECONDS
+
+
+shared_cache = TieredCache(redis_client)
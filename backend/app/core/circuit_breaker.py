@@ -0,0 +1,92 @@
+import time
+from typing import Optional
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, name: str, retry_in: float) -> None:
+        super().__init__(f"Circuit for {name} is open; retry in {retry_in:.1f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe.
+
+    closed -> open after ``failure_threshold`` consecutive failures; open ->
+    half_open once ``recovery_seconds`` have passed, letting one probe through;
+    the probe's outcome closes the circuit or re-opens it for another window.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_seconds: float = 30.0) -> None:
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_seconds = recovery_seconds
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._last_error: Optional[str] = None
+        self._last_failure_at: Optional[float] = None
+        self._trips = 0
+        self._rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._retry_in() <= 0:
+            return self.HALF_OPEN
+        return self._state
+
+    def before_call(self) -> None:
+        """Reserve a call slot or raise CircuitOpenError without touching the upstream."""
+        state = self.state
+        if state == self.CLOSED:
+            return
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = True
+            return
+        self._rejected += 1
+        raise CircuitOpenError(self.name, max(0.0, self._retry_in()))
+
+    def record_success(self) -> None:
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self, error: str) -> None:
+        self._consecutive_failures += 1
+        self._last_error = error
+        self._last_failure_at = time.time()
+        if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self._trips += 1
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def release(self) -> None:
+        """Give back a half-open probe slot when the call ended without a verdict."""
+        self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        state = self.state
+        return {
+            "state": state,
+            "consecutive_failures": self._consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "recovery_seconds": self.recovery_seconds,
+            "retry_in_seconds": round(max(0.0, self._retry_in()), 1) if state == self.OPEN else 0.0,
+            "trips": self._trips,
+            "rejected": self._rejected,
+            "last_error": self._last_error,
+            "last_failure_at": self._last_failure_at,
+        }
+
+    def _retry_in(self) -> float:
+        return self.recovery_seconds - (time.monotonic() - self._opened_at)
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Optional
 import os
 
 try:
@@ -66,6 +67,24 @@ class Settings(BaseSettings):
                 setattr(self, key, value)
 
 
+def env_int(name: str, default: int, minimum: Optional[int] = None) -> int:
+    """Integer tuning knob from the environment; unset or malformed values use ``default``."""
+    try:
+        value = int(os.getenv(name, default))
+    except ValueError:
+        value = default
+    return value if minimum is None else max(minimum, value)
+
+
+def env_float(name: str, default: float, minimum: Optional[float] = None) -> float:
+    """Float tuning knob from the environment; unset or malformed values use ``default``."""
+    try:
+        value = float(os.getenv(name, default))
+    except ValueError:
+        value = default
+    return value if minimum is None else max(minimum, value)
+
+
 @lru_cache()
 def get_settings() -> Settings:
     return Settings()
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+from urllib.parse import urlsplit
+
+import httpx
+
+from .circuit_breaker import CircuitBreaker
+
+try:
+    import h2  # noqa: F401
+    _HAS_H2 = True
+except Exception:  # pragma: no cover - optional dependency
+    _HAS_H2 = False
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamHttpPool:
+    """Long-lived, keep-alive httpx clients shared per upstream host."""
+
+    DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+    DEFAULT_LIMITS = httpx.Limits(
+        max_connections=20,
+        max_keepalive_connections=10,
+        keepalive_expiry=60.0,
+    )
+    DEFAULT_CONCURRENCY = 16
+    DEFAULT_FAILURE_THRESHOLD = 5
+    DEFAULT_RECOVERY_SECONDS = 30.0
+
+    # Hosts that warrant tighter or looser settings than the defaults.
+    HOST_SETTINGS = {
+        "sanctionslistservice.ofac.treas.gov": {
+            "concurrency": 2,
+            "timeout": 20.0,
+            "failure_threshold": 3,
+            "recovery_seconds": 300.0,
+        },
+        "hts.usitc.gov": {
+            "concurrency": 8,
+            "timeout": 10.0,
+            "failure_threshold": 5,
+            "recovery_seconds": 60.0,
+        },
+        "api.exchangerate-api.com": {
+            "concurrency": 4,
+            "timeout": 5.0,
+            "failure_threshold": 3,
+            "recovery_seconds": 60.0,
+        },
+        "restcountries.com": {
+            "concurrency": 8,
+            "timeout": 6.0,
+            "failure_threshold": 3,
+            "recovery_seconds": 120.0,
+        },
+        "api.open-meteo.com": {
+            "concurrency": 4,
+            "timeout": 6.0,
+            "failure_threshold": 3,
+            "recovery_seconds": 60.0,
+        },
+    }
+
+    def __init__(self) -> None:
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._stats: dict[str, dict] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request through the pooled client for the URL's host.
+
+        Raises CircuitOpenError immediately while the host's breaker is open.
+        Transport errors, timeouts, 5xx and 429 responses count as failures.
+        """
+        host = self._host_key(url)
+        client = self._client(host)
+        stats = self._stats[host]
+        breaker = self._breakers[host]
+        breaker.before_call()
+
+        async def trace(event: str, info: dict) -> None:
+            if event == "connection.connect_tcp.complete":
+                stats["connections_opened"] += 1
+
+        extensions = dict(kwargs.pop("extensions", None) or {})
+        extensions["trace"] = trace
+
+        try:
+            async with self._semaphores[host]:
+                stats["requests"] += 1
+                stats["in_flight"] += 1
+                try:
+                    response = await client.request(method, url, extensions=extensions, **kwargs)
+                except Exception as exc:
+                    stats["errors"] += 1
+                    breaker.record_failure(f"{exc.__class__.__name__}: {exc}")
+                    raise
+                finally:
+                    stats["in_flight"] -= 1
+        finally:
+            # Cancelled before a verdict: free the half-open probe slot.
+            breaker.release()
+
+        if response.status_code >= 500 or response.status_code == 429:
+            breaker.record_failure(f"HTTP {response.status_code}")
+        else:
+            breaker.record_success()
+        stats["last_http_version"] = response.http_version
+        return response
+
+    async def start(self) -> None:
+        logger.info("Upstream HTTP pool ready (http2=%s)", _HAS_H2)
+
+    async def aclose(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as exc:
+                logger.warning("Failed to close upstream client: %s", exc)
+
+    def stats(self) -> dict:
+        hosts = {}
+        for host, stats in self._stats.items():
+            reused = max(0, stats["requests"] - stats["errors"] - stats["connections_opened"])
+            completed = max(1, stats["requests"] - stats["errors"])
+            hosts[host] = {
+                **stats,
+                "connections_reused": reused,
+                "reuse_ratio": round(reused / completed, 3),
+                "open": host in self._clients,
+            }
+        return {"http2_available": _HAS_H2, "hosts": hosts}
+
+    def breaker_stats(self) -> dict:
+        return {host: breaker.stats() for host, breaker in self._breakers.items()}
+
+    def _client(self, host: str) -> httpx.AsyncClient:
+        client = self._clients.get(host)
+        if client is not None and not client.is_closed:
+            return client
+
+        settings = self.HOST_SETTINGS.get(host.split("://", 1)[-1], {})
+        timeout = settings.get("timeout")
+        client = httpx.AsyncClient(
+            http2=_HAS_H2,
+            limits=self.DEFAULT_LIMITS,
+            timeout=httpx.Timeout(timeout, connect=5.0) if timeout else self.DEFAULT_TIMEOUT,
+        )
+        self._clients[host] = client
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(
+                host,
+                failure_threshold=settings.get("failure_threshold", self.DEFAULT_FAILURE_THRESHOLD),
+                recovery_seconds=settings.get("recovery_seconds", self.DEFAULT_RECOVERY_SECONDS),
+            )
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(
+                settings.get("concurrency", self.DEFAULT_CONCURRENCY)
+            )
+        self._stats.setdefault(
+            host,
+            {
+                "requests": 0,
+                "errors": 0,
+                "in_flight": 0,
+                "connections_opened": 0,
+                "last_http_version": None,
+            },
+        )
+        return client
+
+    def _host_key(self, url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+upstream_http = UpstreamHttpPool()
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScheduledJob:
+    name: str
+    func: Callable[[], Awaitable[Any]]
+    interval: Optional[float]
+    jitter: float = 0.1
+    timeout: float = 120.0
+    warmup: bool = True
+    runs: int = 0
+    failures: int = 0
+    last_started_at: Optional[float] = None
+    last_finished_at: Optional[float] = None
+    last_success_at: Optional[float] = None
+    last_duration_ms: Optional[float] = None
+    last_error: Optional[str] = None
+    last_result: Any = None
+    next_run_at: Optional[float] = None
+    first_run_done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval,
+            "warmup": self.warmup,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_started_at": self.last_started_at,
+            "last_finished_at": self.last_finished_at,
+            "last_success_at": self.last_success_at,
+            "last_duration_ms": self.last_duration_ms,
+            "last_error": self.last_error,
+            "last_result": self.last_result,
+            "next_run_at": self.next_run_at,
+        }
+
+
+class BackgroundScheduler:
+    """Minimal in-process periodic job runner owned by the FastAPI lifespan.
+
+    Every job runs once at startup, then every ``interval`` seconds with
+    +/- ``jitter`` (a fraction of the interval) so workers do not refresh in
+    lockstep. Jobs with ``interval=None`` run once. The app is ready once every
+    warmup job has finished its first run, successful or not; failures are
+    reported per job and the services keep serving their fallbacks.
+    """
+
+    def __init__(self) -> None:
+        self._jobs: dict[str, ScheduledJob] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[Any]],
+        interval: Optional[float],
+        jitter: float = 0.1,
+        timeout: float = 120.0,
+        warmup: bool = True,
+    ) -> None:
+        if name in self._jobs:
+            raise ValueError(f"Job {name} is already scheduled")
+        self._jobs[name] = ScheduledJob(
+            name=name,
+            func=func,
+            interval=interval,
+            jitter=jitter,
+            timeout=timeout,
+            warmup=warmup,
+        )
+
+    def start(self) -> None:
+        for job in self._jobs.values():
+            self._tasks.append(asyncio.create_task(self._run(job), name=f"scheduler:{job.name}"))
+        logger.info("Scheduler started with %d jobs", len(self._jobs))
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._jobs.clear()
+
+    @property
+    def ready(self) -> bool:
+        return all(job.first_run_done.is_set() for job in self._jobs.values() if job.warmup)
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        waiters = [job.first_run_done.wait() for job in self._jobs.values() if job.warmup]
+        try:
+            await asyncio.wait_for(asyncio.gather(*waiters), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "jobs": {name: job.stats() for name, job in self._jobs.items()},
+        }
+
+    async def _run(self, job: ScheduledJob) -> None:
+        while True:
+            await self._execute(job)
+            job.first_run_done.set()
+            if job.interval is None:
+                job.next_run_at = None
+                return
+
+            delay = job.interval * (1 + random.uniform(-job.jitter, job.jitter))
+            delay = max(1.0, delay)
+            job.next_run_at = time.time() + delay
+            await asyncio.sleep(delay)
+
+    async def _execute(self, job: ScheduledJob) -> None:
+        job.runs += 1
+        job.last_started_at = time.time()
+        started = time.perf_counter()
+        try:
+            job.last_result = await asyncio.wait_for(job.func(), timeout=job.timeout)
+            job.last_error = None
+            job.last_success_at = time.time()
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            job.failures += 1
+            job.last_error = f"timed out after {job.timeout:.0f}s"
+            logger.warning("Scheduled job %s timed out", job.name)
+        except Exception as exc:
+            job.failures += 1
+            job.last_error = f"{exc.__class__.__name__}: {exc}"
+            logger.warning("Scheduled job %s failed: %s", job.name, exc)
+        finally:
+            job.last_duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            job.last_finished_at = time.time()
+
+
+scheduler = BackgroundScheduler()
@@ -0,0 +1,53 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight execution.
+
+    The first caller starts the work as a task; everyone else awaits the same
+    task. Waiters are shielded, so a cancelled request does not cancel the
+    fetch the other callers are waiting on. Keys may be tuples; their first
+    element is used as the stats group.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self._stats: dict[str, dict[str, int]] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        stats = self._group_stats(key)
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+            stats["executions"] += 1
+        else:
+            stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def stats(self) -> dict[str, Any]:
+        groups = {name: dict(values) for name, values in self._stats.items()}
+        return {
+            "executions": sum(item["executions"] for item in groups.values()),
+            "coalesced": sum(item["coalesced"] for item in groups.values()),
+            "in_flight": len(self._calls),
+            "groups": groups,
+        }
+
+    def _group_stats(self, key: Hashable) -> dict[str, int]:
+        group = str(key[0] if isinstance(key, tuple) and key else key)
+        return self._stats.setdefault(group, {"executions": 0, "coalesced": 0})
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved even when every waiter was cancelled.
+        if not task.cancelled():
+            task.exception()
@@ -1,17 +1,31 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .api.v1.router import api_router
+from .core.cache import shared_cache
 from .core.config import get_settings
 from .core.database import Base, engine
+from .core.http_client import upstream_http
 from .core.logging import setup_logging
+from .core.scheduler import scheduler
+from .services.cargo_service import cargo_service
+from .services.compliance_document_service import compliance_document_service
+from .services.landed_cost_service import landed_cost_service
+from .services.live_data_service import live_data_service
+from .services.marine_weather import marine_weather
+from .services.tracking_hub import tracking_hub
 
 settings = get_settings()
 logger = setup_logging()
 
 
+async def _warm_lane_matrix() -> int:
+    return len(landed_cost_service.lane_matrix.table.codes)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting TradeOptimize AI Backend...")
@@ -21,8 +35,27 @@ async def lifespan(app: FastAPI):
         logger.info("Database tables created")
     else:
         logger.warning("Database engine unavailable; skipping migrations")
+    await upstream_http.start()
+    for job in live_data_service.scheduled_jobs():
+        scheduler.add_job(**job)
+    scheduler.add_job("lane_matrix", _warm_lane_matrix, interval=None)
+    scheduler.add_job(
+        "weather_tiles",
+        cargo_service.prefetch_weather,
+        interval=marine_weather.bucket_seconds / 3,
+        warmup=False,
+    )
+    scheduler.add_job("mongo_indexes", compliance_document_service.ensure_indexes, interval=None, warmup=False)
+    scheduler.start()
+    cache_listener = asyncio.create_task(shared_cache.run_invalidation_listener())
     yield
     logger.info("Shutting down...")
+    cache_listener.cancel()
+    with suppress(asyncio.CancelledError):
+        await cache_listener
+    await tracking_hub.close()
+    await scheduler.stop()
+    await upstream_http.aclose()
 
 
 app = FastAPI(
@@ -1,15 +1,22 @@
 from __future__ import annotations
 
+from bisect import bisect_left
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 import hashlib
 import math
 import random
-from typing import List, Optional
+import time
+from typing import List, NamedTuple, Optional
 
-import httpx
+from fastapi import HTTPException
+import numpy as np
 from pydantic import BaseModel
 
+from ..core.config import env_float, env_int
+from .fleet_engine import STATUSES, FleetEngine
 from .live_data_service import live_data_service
+from .marine_weather import marine_weather
 
 
 class Position(BaseModel):
@@ -72,11 +79,19 @@ class CargoTrackingResult(BaseModel):
     delay_risk: str
 
 
+class ShipmentGeometry(NamedTuple):
+    """Everything about a shipment that depends only on its container ID."""
+
+    seed: int
+    profile: dict
+    route_points: List[dict]
+    route_payload: List[RoutePoint]
+    cumulative_km: List[float]
+
+
 class CargoService:
     """Container tracking with deterministic, non-hardcoded shipment generation."""
 
-    WEATHER_URL = "https://api.open-meteo.com/v1/forecast"
-
     PORTS = [
         {"code": "CNSZX", "name": "Yantian, Shenzhen", "country": "CN", "lat": 22.5431, "lon": 114.0579, "region": "APAC"},
         {"code": "CNSHA", "name": "Shanghai", "country": "CN", "lat": 31.2304, "lon": 121.4737, "region": "APAC"},
@@ -107,6 +122,15 @@ class CargoService:
 
     SAMPLE_PREFIXES = ["TCLU", "MSCU", "MAEU", "CMAU", "EGLV", "HLCU", "OOLU", "YMLU"]
 
+    def __init__(self) -> None:
+        self._geometry_cache: OrderedDict[str, ShipmentGeometry] = OrderedDict()
+        self._geometry_cache_size = env_int("CARGO_GEOMETRY_CACHE_SIZE", 4096, minimum=1)
+        self._geometry_stats = {"hits": 0, "misses": 0}
+        # Containers with live-signal tracking recently, for weather tile prefetch.
+        self._active_containers: OrderedDict[str, float] = OrderedDict()
+        self._active_window_seconds = env_float("CARGO_ACTIVE_WINDOW_SECONDS", 1800.0)
+        self.fleet = FleetEngine()
+
     async def track_shipment(
         self,
         container_id: str,
@@ -117,18 +141,23 @@ class CargoService:
         if len(container) < 6:
             return None
 
-        seed = self._seed_int(container)
-        rng = random.Random(seed)
-
-        profile = self._build_shipment_profile(container, rng)
-        route_points = self._build_route_points(profile["origin"], profile["destination"], rng)
+        geometry = self._shipment_geometry(container)
+        seed = geometry.seed
+        profile = geometry.profile
         schedule = self._build_schedule(profile["transit_days"], seed)
 
         progress = schedule["progress"]
-        current_position = self._interpolate_position(route_points, progress, schedule["now"], seed)
+        current_position = self._interpolate_position(
+            geometry.route_points,
+            progress,
+            schedule["now"],
+            seed,
+            cumulative=geometry.cumulative_km,
+        )
         timeline = self._build_timeline(schedule, profile, progress)
 
         if include_live_signals:
+            self._mark_active(container)
             weather_snapshot = await self._fetch_weather_snapshot(
                 current_position.latitude,
                 current_position.longitude,
@@ -162,19 +191,9 @@ class CargoService:
             now=schedule["now"],
         )
 
-        route_payload = [
-            RoutePoint(
-                lat=round(point["lat"], 5),
-                lon=round(point["lon"], 5),
-                name=point["name"],
-                kind=point["kind"],
-            )
-            for point in route_points
-        ]
-
         shipment = ShipmentDetails(
             container_id=container,
-            bill_of_lading=profile["bill_of_lading"],
+            bill_of_lading=self._bill_of_lading(profile, schedule["now"]),
             vessel=profile["vessel"],
             voyage=profile["voyage"],
             carrier=profile["carrier"],
@@ -196,32 +215,86 @@ class CargoService:
             timeline=timeline,
             alerts=alerts,
             progress_percent=int(round(progress * 100)),
-            route_points=route_payload,
+            route_points=geometry.route_payload,
             reliability_score=reliability_score,
             delay_risk=delay_risk,
         )
 
     async def get_all_shipments(self) -> List[dict]:
         """Return deterministic sample shipments for dashboard use."""
+        self._ensure_sample_fleet()
+        now = datetime.now(timezone.utc)
+        fleet = self.fleet.evaluate(now)
         results: List[dict] = []
         for idx, prefix in enumerate(self.SAMPLE_PREFIXES):
-            container_id = f"{prefix}{(1000000 + (idx * 13719)) % 9000000:07d}"
-            tracking = await self.track_shipment(container_id, include_live_signals=False)
-            if not tracking:
-                continue
+            row = self._fleet_row(self.fleet.index[self._sample_container_id(idx, prefix)], fleet, now)
             results.append(
                 {
-                    "container_id": tracking.shipment.container_id,
-                    "vessel": tracking.shipment.vessel,
-                    "origin": tracking.shipment.origin_port,
-                    "destination": tracking.shipment.destination_port,
-                    "eta": tracking.shipment.eta.isoformat(),
-                    "progress_percent": tracking.progress_percent,
-                    "status": self._status_from_timeline(tracking.timeline),
+                    "container_id": row["container_id"],
+                    "vessel": row["vessel"],
+                    "origin": row["origin"],
+                    "destination": row["destination"],
+                    "eta": row["eta"],
+                    "progress_percent": row["progress_percent"],
+                    "status": row["status"],
                 }
             )
         return results
 
+    async def get_fleet_page(self, page: int = 1, page_size: int = 100, status: Optional[str] = None) -> dict:
+        """Evaluate the whole fleet in one vectorized pass and return one page of rows."""
+        self._ensure_sample_fleet()
+        now = datetime.now(timezone.utc)
+        fleet = self.fleet.evaluate(now)
+        status_codes = fleet["status"]
+
+        rows = np.arange(len(status_codes))
+        if status:
+            normalized = status.strip().upper()
+            if normalized not in STATUSES:
+                raise HTTPException(status_code=400, detail=f"Unknown status {status}")
+            rows = np.flatnonzero(status_codes == STATUSES.index(normalized))
+
+        offset = (page - 1) * page_size
+        counts = np.bincount(status_codes, minlength=len(STATUSES))
+        return {
+            "generated_at": now.isoformat(),
+            "total": int(len(rows)),
+            "page": page,
+            "page_size": page_size,
+            "status_counts": {name: int(counts[code]) for code, name in enumerate(STATUSES)},
+            "items": [self._fleet_row(int(row), fleet, now) for row in rows[offset:offset + page_size]],
+        }
+
+    def _ensure_sample_fleet(self) -> None:
+        samples = [self._sample_container_id(idx, prefix) for idx, prefix in enumerate(self.SAMPLE_PREFIXES)]
+        missing = [container for container in samples if container not in self.fleet]
+        if missing:
+            self.fleet.add((container, self._shipment_geometry(container)) for container in missing)
+
+    def _fleet_row(self, row: int, fleet: dict, now: datetime) -> dict:
+        profile = self.fleet.profiles[row]
+        departed = now - timedelta(seconds=int(fleet["phase_seconds"][row]))
+        eta = departed + timedelta(seconds=int(fleet["transit_seconds"][row]))
+        return {
+            "container_id": self.fleet.containers[row],
+            "vessel": profile["vessel"],
+            "carrier": profile["carrier"],
+            "origin": profile["origin"]["name"],
+            "origin_country": profile["origin"]["country"],
+            "destination": profile["destination"]["name"],
+            "destination_country": profile["destination"]["country"],
+            "latitude": float(fleet["latitude"][row]),
+            "longitude": float(fleet["longitude"][row]),
+            "heading": int(fleet["heading"][row]),
+            "speed_knots": float(fleet["speed_knots"][row]),
+            "location_name": self.fleet.location_name(row, fleet),
+            "progress_percent": int(round(float(fleet["progress"][row]) * 100)),
+            "departed": departed.isoformat(),
+            "eta": eta.isoformat(),
+            "status": STATUSES[int(fleet["status"][row])],
+        }
+
     async def search_shipments(self, query: str) -> List[dict]:
         """Search deterministic samples and also container-like direct tracking."""
         normalized_query = "".join(ch for ch in query.upper() if ch.isalnum())
@@ -264,6 +337,97 @@ class CargoService:
 
         return results[:10]
 
+    def get_cache_stats(self) -> dict:
+        return {
+            "entries": len(self._geometry_cache),
+            "max_entries": self._geometry_cache_size,
+            **self._geometry_stats,
+            "fleet_size": len(self.fleet),
+        }
+
+    async def prefetch_weather(self) -> int:
+        """Warm weather tiles under the fleet book and every recently tracked container."""
+        cutoff = time.monotonic() - self._active_window_seconds
+        for container in [item for item, seen in self._active_containers.items() if seen < cutoff]:
+            del self._active_containers[container]
+
+        self._ensure_sample_fleet()
+        fleet = self.fleet.evaluate(datetime.now(timezone.utc))
+        points = list(zip(fleet["latitude"].tolist(), fleet["longitude"].tolist()))
+        for container in self._active_containers:
+            if container in self.fleet:
+                continue
+            geometry = self._shipment_geometry(container)
+            schedule = self._build_schedule(geometry.profile["transit_days"], geometry.seed)
+            position = self._interpolate_position(
+                geometry.route_points,
+                schedule["progress"],
+                schedule["now"],
+                geometry.seed,
+                cumulative=geometry.cumulative_km,
+            )
+            points.append((position.latitude, position.longitude))
+        return await marine_weather.prefetch(points)
+
+    def _mark_active(self, container: str) -> None:
+        self._active_containers[container] = time.monotonic()
+        self._active_containers.move_to_end(container)
+        while len(self._active_containers) > self._geometry_cache_size:
+            self._active_containers.popitem(last=False)
+
+    def _sample_container_id(self, idx: int, prefix: str) -> str:
+        return f"{prefix}{(1000000 + (idx * 13719)) % 9000000:07d}"
+
+    def _shipment_geometry(self, container: str) -> ShipmentGeometry:
+        """Return the cached profile and route for a container, building it on first use."""
+        geometry = self._geometry_cache.get(container)
+        if geometry is not None:
+            self._geometry_cache.move_to_end(container)
+            self._geometry_stats["hits"] += 1
+            return geometry
+
+        self._geometry_stats["misses"] += 1
+        geometry = self._build_geometry(container)
+        self._geometry_cache[container] = geometry
+        while len(self._geometry_cache) > self._geometry_cache_size:
+            self._geometry_cache.popitem(last=False)
+        return geometry
+
+    def _build_geometry(self, container: str) -> ShipmentGeometry:
+        seed = self._seed_int(container)
+        rng = random.Random(seed)
+        profile = self._build_shipment_profile(container, rng)
+        route_points = self._build_route_points(profile["origin"], profile["destination"], rng)
+        route_payload = [
+            RoutePoint(
+                lat=round(point["lat"], 5),
+                lon=round(point["lon"], 5),
+                name=point["name"],
+                kind=point["kind"],
+            )
+            for point in route_points
+        ]
+        return ShipmentGeometry(
+            seed=seed,
+            profile=profile,
+            route_points=route_points,
+            route_payload=route_payload,
+            cumulative_km=self._cumulative_km(route_points),
+        )
+
+    def _cumulative_km(self, route_points: List[dict]) -> List[float]:
+        cumulative = [0.0]
+        for idx in range(len(route_points) - 1):
+            current = route_points[idx]
+            nxt = route_points[idx + 1]
+            cumulative.append(
+                cumulative[-1] + self._haversine_km(current["lat"], current["lon"], nxt["lat"], nxt["lon"])
+            )
+        return cumulative
+
+    def normalize_container_id(self, value: str) -> str:
+        return self._normalize_container_id(value)
+
     def _normalize_container_id(self, value: str) -> str:
         return "".join(ch for ch in (value or "").upper() if ch.isalnum())
 
@@ -290,15 +454,15 @@ class CargoService:
 
         vessel = self._build_vessel_name(carrier, rng)
         voyage = f"{rng.randint(100, 999)}{chr(65 + rng.randint(0, 25))}"
-        now = datetime.now(timezone.utc)
-        bill = f"{carrier[:3].upper()}{now.strftime('%y%m')}{rng.randint(100000, 999999)}"
+        # The bill of lading embeds the current month, so only its serial is part of the profile.
+        bill_serial = rng.randint(100000, 999999)
 
         weight_min, weight_max = cargo["weight"]
         value_min, value_max = cargo["value"]
 
         return {
             "container_id": container_id,
-            "bill_of_lading": bill,
+            "bill_serial": bill_serial,
             "vessel": vessel,
             "voyage": voyage,
             "carrier": carrier,
@@ -311,6 +475,9 @@ class CargoService:
             "transit_days": transit_days,
         }
 
+    def _bill_of_lading(self, profile: dict, now: datetime) -> str:
+        return f"{profile['carrier'][:3].upper()}{now.strftime('%y%m')}{profile['bill_serial']}"
+
     def _carrier_for_container(self, container_id: str, rng: random.Random) -> str:
         prefix_map = {
             "MSCU": "MSC",
@@ -414,7 +581,14 @@ class CargoService:
             "arrived_seconds": arrived_seconds,
         }
 
-    def _interpolate_position(self, route_points: List[dict], progress: float, now: datetime, seed: int) -> Position:
+    def _interpolate_position(
+        self,
+        route_points: List[dict],
+        progress: float,
+        now: datetime,
+        seed: int,
+        cumulative: Optional[List[float]] = None,
+    ) -> Position:
         if not route_points:
             return Position(
                 latitude=0.0,
@@ -447,22 +621,15 @@ class CargoService:
                 timestamp=now,
             )
 
-        cumulative = [0.0]
-        for idx in range(len(route_points) - 1):
-            current = route_points[idx]
-            nxt = route_points[idx + 1]
-            cumulative.append(
-                cumulative[-1] + self._haversine_km(current["lat"], current["lon"], nxt["lat"], nxt["lon"])
-            )
+        if cumulative is None:
+            cumulative = self._cumulative_km(route_points)
 
         total = cumulative[-1] if cumulative[-1] > 0 else 1.0
         target = total * progress
 
-        segment_index = 0
-        for idx in range(len(cumulative) - 1):
-            if cumulative[idx + 1] >= target:
-                segment_index = idx
-                break
+        # First segment whose end reaches the target; 0 when none does (degenerate route).
+        segment_end = bisect_left(cumulative, target, 1)
+        segment_index = segment_end - 1 if segment_end < len(cumulative) else 0
 
         start = route_points[segment_index]
         end = route_points[min(segment_index + 1, len(route_points) - 1)]
@@ -549,34 +716,7 @@ class CargoService:
         return events
 
     async def _fetch_weather_snapshot(self, lat: float, lon: float) -> Optional[dict]:
-        params = {
-            "latitude": round(lat, 3),
-            "longitude": round(lon, 3),
-            "current": "wind_speed_10m,wind_direction_10m,wave_height",
-        }
-
-        try:
-            async with httpx.AsyncClient(timeout=6.0) as client:
-                response = await client.get(self.WEATHER_URL, params=params)
-                response.raise_for_status()
-                payload = response.json()
-        except Exception:
-            return None
-
-        current = payload.get("current", {}) if isinstance(payload, dict) else {}
-        if not isinstance(current, dict):
-            return None
-
-        wind_speed = current.get("wind_speed_10m")
-        wave_height = current.get("wave_height")
-        if wind_speed is None and wave_height is None:
-            return None
-
-        return {
-            "wind_speed_10m": float(wind_speed) if wind_speed is not None else None,
-            "wave_height": float(wave_height) if wave_height is not None else None,
-            "wind_direction_10m": int(float(current.get("wind_direction_10m", 0))),
-        }
+        return await marine_weather.get_snapshot(lat, lon)
 
     def _compute_delay_risk(self, route_risk: dict, weather_snapshot: Optional[dict]) -> str:
         score = 0
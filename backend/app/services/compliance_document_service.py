@@ -1,8 +1,17 @@
+import hashlib
+import json
+import re
+import zipfile
 from datetime import datetime, timezone
-from typing import Optional
+from typing import AsyncIterator, Optional
+from urllib.parse import quote
 
 from bson import ObjectId
 from fastapi import HTTPException, UploadFile
+from fastapi.responses import Response, StreamingResponse
+from gridfs.errors import NoFile
+from pymongo import InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 
 from ..core.database import get_mongo
 
@@ -12,10 +21,65 @@ except Exception:  # pragma: no cover - optional dependency
     AsyncIOMotorGridFSBucket = None
 
 
+class _ZipSink:
+    """Write-only, unseekable file object that zipfile streams into; drained between writes."""
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+
+    def write(self, data) -> int:
+        self._buffer += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _parse_byte_range(header: str, length: int) -> Optional[tuple[int, int]]:
+    """Parse a single ``bytes=`` range into inclusive offsets; None means serve the whole file."""
+    match = re.fullmatch(r"\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*", header or "")
+    if match is None or not any(match.groups()):
+        # Multi-range and malformed headers may be ignored per RFC 9110.
+        return None
+    first, last = match.groups()
+    unsatisfiable = HTTPException(
+        status_code=416,
+        detail="Requested range not satisfiable",
+        headers={"Content-Range": f"bytes */{length}"},
+    )
+    if not first:
+        suffix = int(last)
+        if suffix == 0:
+            raise unsatisfiable
+        return max(0, length - suffix), length - 1
+
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= length:
+        raise unsatisfiable
+    return start, min(int(last), length - 1) if last else length - 1
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [item.strip() for item in header.split(",")]
+    return "*" in candidates or any(item.removeprefix("W/") == etag for item in candidates)
+
+
 class ComplianceDocumentService:
     """Persist compliance cases and document uploads in MongoDB/GridFS."""
 
     MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+    # Matches the GridFS default chunk size so each read fills exactly one chunk.
+    UPLOAD_CHUNK_BYTES = 255 * 1024
+    DOWNLOAD_CHUNK_BYTES = 255 * 1024
 
     def _collection(self):
         db = get_mongo()
@@ -27,6 +91,22 @@ class ComplianceDocumentService:
             return None
         return AsyncIOMotorGridFSBucket(db, bucket_name="compliance_docs")
 
+    async def ensure_indexes(self) -> str:
+        """Create the content-hash index behind upload dedup; safe to run on every start."""
+        files = self._gridfs_files()
+        if files is None:
+            return "mongo unavailable"
+        await files.create_index(
+            [("metadata.sha256", 1), ("length", 1)],
+            name="content_sha256_length",
+            partialFilterExpression={"metadata.sha256": {"$exists": True}},
+        )
+        return "indexes ensured"
+
+    def _gridfs_files(self):
+        db = get_mongo()
+        return db["compliance_docs.files"] if db is not None else None
+
     def _to_object_id(self, value: str) -> ObjectId:
         try:
             return ObjectId(value)
@@ -38,32 +118,24 @@ class ComplianceDocumentService:
         if collection is None:
             return None
 
-        now = datetime.now(timezone.utc)
-        normalized_docs = []
-        for doc in required_documents:
-            name = str(doc.get("name", "")).strip()
-            if not name:
-                continue
-            normalized_docs.append(
-                {
-                    "name": name,
-                    "required": str(doc.get("status", "")).lower() == "required",
-                }
-            )
+        payload = self._new_case(request_payload, required_documents)
+        result = await collection.insert_one(payload)
+        return str(result.inserted_id)
 
-        payload = {
+    def _new_case(self, request_payload: dict, required_documents: list[dict]) -> dict:
+        now = datetime.now(timezone.utc)
+        return {
+            "_id": ObjectId(),
             "hs_code": request_payload.get("hs_code"),
             "origin_country": request_payload.get("origin_country"),
             "destination_country": request_payload.get("destination_country"),
             "supplier_name": request_payload.get("supplier_name"),
             "product_description": request_payload.get("product_description"),
-            "required_documents": normalized_docs,
+            "required_documents": self._normalize_required(required_documents),
             "uploaded_documents": [],
             "created_at": now,
             "updated_at": now,
         }
-        result = await collection.insert_one(payload)
-        return str(result.inserted_id)
 
     async def get_case(self, compliance_case_id: str) -> Optional[dict]:
         collection = self._collection()
@@ -79,66 +151,204 @@ class ComplianceDocumentService:
         request_payload: dict,
         required_documents: list[dict],
     ) -> Optional[str]:
+        case_id, _ = await self.sync_case_statuses(compliance_case_id, request_payload, required_documents)
+        return case_id
+
+    async def sync_case_statuses(
+        self,
+        compliance_case_id: str,
+        request_payload: dict,
+        required_documents: list[dict],
+    ) -> tuple[Optional[str], Optional[list[dict]]]:
+        """Create or merge a case and return (case_id, document statuses) in one round trip.
+
+        Existing cases are merged server-side with an aggregation-pipeline update
+        and the post-image feeds the statuses, so no follow-up read is needed.
+        """
         collection = self._collection()
         if collection is None:
-            return None
-
-        if not compliance_case_id:
-            return await self.create_case(request_payload, required_documents)
+            return None, None
+
+        incoming = self._normalize_required(required_documents)
+        if compliance_case_id:
+            case = await collection.find_one_and_update(
+                {"_id": self._to_object_id(compliance_case_id)},
+                self._merge_requirements_pipeline(request_payload, incoming),
+                return_document=ReturnDocument.AFTER,
+            )
+            if case is not None:
+                return compliance_case_id, self._statuses_for_case(case)
 
-        case = await self.get_case(compliance_case_id)
-        if case is None:
-            return await self.create_case(request_payload, required_documents)
+        case_id = await self.create_case(request_payload, required_documents)
+        case = {"required_documents": incoming, "uploaded_documents": []}
+        return case_id, self._statuses_for_case(case)
 
-        required_index = {}
-        existing_order = []
-        for doc in case.get("required_documents", []):
-            name = str(doc.get("name", "")).strip()
-            if not name:
+    async def sync_cases_bulk(
+        self,
+        cases: list[tuple[str, dict, list[dict]]],
+    ) -> Optional[list[tuple[Optional[str], Optional[list[dict]], Optional[str]]]]:
+        """Create or merge many cases with one bulk write; returns (case_id, statuses, error) per input.
+
+        New cases are inserted with client-side ids. Lines naming the same case id
+        share one pipeline merge, and one new case when that id matches nothing.
+        Statuses for merged cases come from a single $in read after the write.
+        Write errors are reported on the lines behind the failing operation.
+        """
+        collection = self._collection()
+        if collection is None or not cases:
+            return None if collection is None else []
+
+        results: list[Optional[tuple[Optional[str], Optional[list[dict]], Optional[str]]]] = [None] * len(cases)
+        operations = []
+        operation_lines: list[list[int]] = []
+        existing: dict[ObjectId, list[int]] = {}
+        for position, (case_id, request_payload, required_documents) in enumerate(cases):
+            if not case_id:
+                case = self._new_case(request_payload, required_documents)
+                operations.append(InsertOne(case))
+                operation_lines.append([position])
+                results[position] = (str(case["_id"]), self._statuses_for_case(case), None)
                 continue
-            existing_order.append(name)
-            required_index[name] = bool(doc.get("required", True))
+            try:
+                existing.setdefault(self._to_object_id(case_id), []).append(position)
+            except HTTPException as exc:
+                results[position] = (None, None, exc.detail)
+
+        for object_id, positions in existing.items():
+            request_payload, required_documents = self._combined_case_input(cases, positions)
+            incoming = self._normalize_required(required_documents)
+            operations.append(
+                UpdateOne({"_id": object_id}, self._merge_requirements_pipeline(request_payload, incoming))
+            )
+            operation_lines.append(positions)
+
+        for position, error in (await self._bulk_write_errors(collection, operations, operation_lines)).items():
+            results[position] = (None, None, error)
+        existing = {
+            object_id: positions for object_id, positions in existing.items() if results[positions[0]] is None
+        }
+
+        if existing:
+            cursor = collection.find(
+                {"_id": {"$in": list(existing)}},
+                {"required_documents": 1, "uploaded_documents": 1},
+            )
+            async for case in cursor:
+                statuses = self._statuses_for_case(case)
+                for position in existing.pop(case["_id"], []):
+                    results[position] = (str(case["_id"]), statuses, None)
+
+        # Ids that matched nothing become one new case per id, shared by its lines.
+        if existing:
+            groups = list(existing.values())
+            new_cases = [self._new_case(*self._combined_case_input(cases, positions)) for positions in groups]
+            errors = await self._bulk_write_errors(
+                collection,
+                [InsertOne(case) for case in new_cases],
+                groups,
+            )
+            for positions, case in zip(groups, new_cases):
+                statuses = self._statuses_for_case(case)
+                for position in positions:
+                    if position in errors:
+                        results[position] = (None, None, errors[position])
+                    else:
+                        results[position] = (str(case["_id"]), statuses, None)
 
-        incoming_order = []
+        return results
+
+    async def _bulk_write_errors(
+        self,
+        collection,
+        operations: list,
+        operation_lines: list[list[int]],
+    ) -> dict[int, str]:
+        """Run an unordered bulk write and map each failed operation back to its input lines."""
+        if not operations:
+            return {}
+        try:
+            await collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as exc:
+            errors = {}
+            for error in exc.details.get("writeErrors", []):
+                message = f"Case sync failed: {error.get('errmsg', 'write error')}"
+                for position in operation_lines[error["index"]]:
+                    errors[position] = message
+            return errors
+        return {}
+
+    def _combined_case_input(
+        self,
+        cases: list[tuple[str, dict, list[dict]]],
+        positions: list[int],
+    ) -> tuple[dict, list[dict]]:
+        # The last line's fields win, as they would with one update per line.
+        required_documents = [doc for position in positions for doc in cases[position][2]]
+        return cases[positions[-1]][1], required_documents
+
+    def _normalize_required(self, required_documents: list[dict]) -> list[dict]:
+        merged: dict[str, bool] = {}
         for doc in required_documents:
             name = str(doc.get("name", "")).strip()
             if not name:
                 continue
-            incoming_order.append(name)
             is_required = str(doc.get("status", "")).lower() == "required"
-            if name in required_index:
-                required_index[name] = required_index[name] or is_required
-            else:
-                required_index[name] = is_required
-
-        merged_required = []
-        seen = set()
-        for name in existing_order + incoming_order:
-            if name in seen:
-                continue
-            seen.add(name)
-            merged_required.append(
-                {
-                    "name": name,
-                    "required": required_index.get(name, True),
-                }
-            )
-
-        await collection.update_one(
-            {"_id": case["_id"]},
+            merged[name] = merged.get(name, False) or is_required
+        return [{"name": name, "required": required} for name, required in merged.items()]
+
+    def _merge_requirements_pipeline(self, request_payload: dict, incoming: list[dict]) -> list[dict]:
+        # Existing order first, new names appended, and a document stays required
+        # if either side requires it.
+        required_names = [doc["name"] for doc in incoming if doc["required"]]
+        return [
             {
                 "$set": {
-                    "hs_code": request_payload.get("hs_code"),
-                    "origin_country": request_payload.get("origin_country"),
-                    "destination_country": request_payload.get("destination_country"),
-                    "supplier_name": request_payload.get("supplier_name"),
-                    "product_description": request_payload.get("product_description"),
-                    "required_documents": merged_required,
+                    # Request values are wrapped so a leading "$" is stored, not evaluated.
+                    **{
+                        field: {"$literal": request_payload.get(field)}
+                        for field in (
+                            "hs_code",
+                            "origin_country",
+                            "destination_country",
+                            "supplier_name",
+                            "product_description",
+                        )
+                    },
                     "updated_at": datetime.now(timezone.utc),
+                    "required_documents": {
+                        "$let": {
+                            "vars": {"existing": {"$ifNull": ["$required_documents", []]}},
+                            "in": {
+                                "$concatArrays": [
+                                    {
+                                        "$map": {
+                                            "input": "$$existing",
+                                            "as": "doc",
+                                            "in": {
+                                                "name": "$$doc.name",
+                                                "required": {
+                                                    "$or": [
+                                                        {"$ifNull": ["$$doc.required", True]},
+                                                        {"$in": ["$$doc.name", {"$literal": required_names}]},
+                                                    ]
+                                                },
+                                            },
+                                        }
+                                    },
+                                    {
+                                        "$filter": {
+                                            "input": {"$literal": incoming},
+                                            "as": "doc",
+                                            "cond": {"$not": [{"$in": ["$$doc.name", "$$existing.name"]}]},
+                                        }
+                                    },
+                                ]
+                            },
+                        }
+                    },
                 }
-            },
-        )
-        return compliance_case_id
+            }
+        ]
 
     async def upload_document(
         self,
@@ -151,25 +361,20 @@ class ComplianceDocumentService:
         if collection is None or gridfs is None:
             raise HTTPException(status_code=503, detail="Document storage unavailable")
 
-        case = await self.get_case(compliance_case_id)
-        if case is None:
-            raise HTTPException(status_code=404, detail="Compliance case not found")
-
+        object_id = self._to_object_id(compliance_case_id)
         clean_doc_name = (document_name or "").strip()
         if not clean_doc_name:
             raise HTTPException(status_code=400, detail="document_name is required")
-
-        content = await file.read(self.MAX_UPLOAD_BYTES + 1)
-        if not content:
-            raise HTTPException(status_code=400, detail="Uploaded file is empty")
-        if len(content) > self.MAX_UPLOAD_BYTES:
-            raise HTTPException(status_code=413, detail="File exceeds 10MB limit")
+        # Reject unknown cases before any chunk is written; the update below stays atomic.
+        if await collection.find_one({"_id": object_id}, {"_id": 1}) is None:
+            raise HTTPException(status_code=404, detail="Compliance case not found")
 
         now = datetime.now(timezone.utc)
-        file_id = await gridfs.upload_from_stream(
+        file_id, size_bytes, sha256, reused = await self._stream_to_gridfs(
+            gridfs,
+            file,
             file.filename or clean_doc_name,
-            content,
-            metadata={
+            {
                 "compliance_case_id": compliance_case_id,
                 "document_name": clean_doc_name,
                 "content_type": file.content_type or "application/octet-stream",
@@ -182,23 +387,39 @@ class ComplianceDocumentService:
             "file_id": str(file_id),
             "filename": file.filename or clean_doc_name,
             "content_type": file.content_type or "application/octet-stream",
-            "size_bytes": len(content),
+            "size_bytes": size_bytes,
+            "sha256": sha256,
             "uploaded_at": now,
         }
 
-        await collection.update_one(
-            {"_id": case["_id"]},
-            {
-                "$pull": {"uploaded_documents": {"name": clean_doc_name}},
-            },
-        )
-        await collection.update_one(
-            {"_id": case["_id"]},
-            {
-                "$push": {"uploaded_documents": uploaded_meta},
-                "$set": {"updated_at": now},
-            },
+        # Replace any previous upload of this document in one atomic pipeline update.
+        case = await collection.find_one_and_update(
+            {"_id": object_id},
+            [
+                {
+                    "$set": {
+                        "uploaded_documents": {
+                            "$concatArrays": [
+                                {
+                                    "$filter": {
+                                        "input": {"$ifNull": ["$uploaded_documents", []]},
+                                        "as": "doc",
+                                        "cond": {"$ne": ["$$doc.name", {"$literal": clean_doc_name}]},
+                                    }
+                                },
+                                [{"$literal": uploaded_meta}],
+                            ]
+                        },
+                        "updated_at": now,
+                    }
+                }
+            ],
+            return_document=ReturnDocument.AFTER,
         )
+        if case is None:
+            if not reused:
+                await gridfs.delete(file_id)
+            raise HTTPException(status_code=404, detail="Compliance case not found")
 
         return {
             "compliance_case_id": compliance_case_id,
@@ -207,16 +428,226 @@ class ComplianceDocumentService:
                 "filename": uploaded_meta["filename"],
                 "content_type": uploaded_meta["content_type"],
                 "size_bytes": uploaded_meta["size_bytes"],
+                "sha256": sha256,
+                "deduplicated": reused,
                 "uploaded_at": now.isoformat(),
                 "status": "uploaded",
             },
+            "documents": self._statuses_for_case(case),
         }
 
+    async def _stream_to_gridfs(
+        self,
+        gridfs,
+        file: UploadFile,
+        filename: str,
+        metadata: dict,
+    ) -> tuple[ObjectId, int, str, bool]:
+        """Copy an upload into GridFS one chunk at a time, hashing as it goes.
+
+        Returns (file_id, size, sha256, reused). Dedup is best-effort: a body that
+        fits in one chunk is looked up by hash before anything is written, but a
+        larger one only after all of its chunks are stored, and the new file is
+        then aborted. Concurrent identical uploads can both miss the lookup, so
+        dedup does not bound storage.
+        """
+        digest = hashlib.sha256()
+        first = await self._read_upload_chunk(file, 0)
+        if not first:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty")
+        digest.update(first)
+        chunk = await self._read_upload_chunk(file, len(first))
+        single_chunk = not chunk
+        if single_chunk:
+            sha256 = digest.hexdigest()
+            existing = await self._find_duplicate(sha256, len(first))
+            if existing is not None:
+                return existing, len(first), sha256, True
+
+        grid_in = gridfs.open_upload_stream(
+            filename,
+            chunk_size_bytes=self.UPLOAD_CHUNK_BYTES,
+            metadata=metadata,
+        )
+        size = len(first)
+        try:
+            await grid_in.write(first)
+            while chunk:
+                size += len(chunk)
+                digest.update(chunk)
+                await grid_in.write(chunk)
+                chunk = await self._read_upload_chunk(file, size)
+
+            sha256 = digest.hexdigest()
+            if not single_chunk:
+                existing = await self._find_duplicate(sha256, size)
+                if existing is not None:
+                    await grid_in.abort()
+                    return existing, size, sha256, True
+
+            await grid_in.set("metadata", {**metadata, "sha256": sha256})
+            await grid_in.close()
+        except BaseException:
+            if not grid_in.closed:
+                await grid_in.abort()
+            raise
+        return grid_in._id, size, sha256, False
+
+    async def _read_upload_chunk(self, file: UploadFile, size: int) -> bytes:
+        chunk = await file.read(self.UPLOAD_CHUNK_BYTES)
+        if size + len(chunk) > self.MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail="File exceeds 10MB limit")
+        return chunk
+
+    async def _find_duplicate(self, sha256: str, size: int) -> Optional[ObjectId]:
+        existing = await self._gridfs_files().find_one(
+            {"metadata.sha256": sha256, "length": size},
+            {"_id": 1},
+        )
+        return existing["_id"] if existing is not None else None
+
+    async def document_response(
+        self,
+        compliance_case_id: str,
+        document_name: str,
+        range_header: Optional[str] = None,
+        if_none_match: Optional[str] = None,
+        if_range: Optional[str] = None,
+    ) -> Response:
+        """Serve one uploaded document with Range and If-None-Match support, streamed from GridFS."""
+        collection = self._collection()
+        gridfs = self._gridfs()
+        if collection is None or gridfs is None:
+            raise HTTPException(status_code=503, detail="Document storage unavailable")
+
+        clean_doc_name = (document_name or "").strip()
+        case = await collection.find_one(
+            {"_id": self._to_object_id(compliance_case_id)},
+            {"uploaded_documents": {"$elemMatch": {"name": clean_doc_name}}},
+        )
+        if case is None:
+            raise HTTPException(status_code=404, detail="Compliance case not found")
+        uploaded = (case.get("uploaded_documents") or [None])[0]
+        if uploaded is None:
+            raise HTTPException(status_code=404, detail="Document not uploaded")
+
+        # Content-addressed when the hash is known; GridFS ids are immutable otherwise.
+        etag = f'"{uploaded.get("sha256") or uploaded["file_id"]}"'
+        headers = {
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "private, max-age=0, must-revalidate",
+        }
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+        try:
+            grid_out = await gridfs.open_download_stream(ObjectId(uploaded["file_id"]))
+        except NoFile as exc:
+            raise HTTPException(status_code=404, detail="Document content missing") from exc
+
+        length = grid_out.length
+        byte_range = None
+        if range_header and (not if_range or if_range.strip() == etag):
+            try:
+                byte_range = _parse_byte_range(range_header, length)
+            except HTTPException:
+                grid_out.close()
+                raise
+        start, end = byte_range or (0, length - 1)
+
+        filename = uploaded.get("filename") or clean_doc_name
+        headers["Content-Length"] = str(end - start + 1)
+        headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{quote(filename)}"
+        if byte_range is not None:
+            headers["Content-Range"] = f"bytes {start}-{end}/{length}"
+        return StreamingResponse(
+            self._iter_grid_out(grid_out, start, end - start + 1),
+            status_code=206 if byte_range is not None else 200,
+            media_type=uploaded.get("content_type") or "application/octet-stream",
+            headers=headers,
+        )
+
+    async def export_case_archive(self, compliance_case_id: str) -> StreamingResponse:
+        """Stream a zip of every uploaded document in a case plus a manifest, one chunk at a time."""
+        case = await self.get_case(compliance_case_id)
+        gridfs = self._gridfs()
+        if gridfs is None:
+            raise HTTPException(status_code=503, detail="Document storage unavailable")
+        if case is None:
+            raise HTTPException(status_code=404, detail="Compliance case not found")
+
+        return StreamingResponse(
+            self._iter_case_zip(gridfs, compliance_case_id, case),
+            media_type="application/zip",
+            headers={
+                "Content-Disposition": f'attachment; filename="compliance_case_{compliance_case_id}.zip"',
+            },
+        )
+
+    async def _iter_grid_out(self, grid_out, start: int, remaining: int) -> AsyncIterator[bytes]:
+        try:
+            if start:
+                grid_out.seek(start)
+            while remaining > 0:
+                chunk = await grid_out.read(min(self.DOWNLOAD_CHUNK_BYTES, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            grid_out.close()
+
+    async def _iter_case_zip(self, gridfs, compliance_case_id: str, case: dict) -> AsyncIterator[bytes]:
+        sink = _ZipSink()
+        manifest = {
+            "compliance_case_id": compliance_case_id,
+            "hs_code": case.get("hs_code"),
+            "origin_country": case.get("origin_country"),
+            "destination_country": case.get("destination_country"),
+            "supplier_name": case.get("supplier_name"),
+            "exported_at": datetime.now(timezone.utc).isoformat(),
+            "documents": self._statuses_for_case(case),
+            "files": [],
+        }
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for uploaded in case.get("uploaded_documents", []):
+                arcname = self._archive_name(uploaded)
+                try:
+                    grid_out = await gridfs.open_download_stream(ObjectId(uploaded["file_id"]))
+                except NoFile:
+                    manifest["files"].append({"name": uploaded.get("name"), "missing": True})
+                    continue
+                with archive.open(arcname, mode="w") as entry:
+                    async for chunk in self._iter_grid_out(grid_out, 0, grid_out.length):
+                        entry.write(chunk)
+                        yield sink.drain()
+                manifest["files"].append(
+                    {
+                        "name": uploaded.get("name"),
+                        "path": arcname,
+                        "size_bytes": uploaded.get("size_bytes"),
+                        "sha256": uploaded.get("sha256"),
+                    }
+                )
+            archive.writestr("manifest.json", json.dumps(manifest, indent=2, default=str))
+        yield sink.drain()
+
+    def _archive_name(self, uploaded: dict) -> str:
+        def clean(value: str) -> str:
+            return re.sub(r"[\\/:*?\"<>|]+", "_", value).strip(". ") or "document"
+
+        name = clean(str(uploaded.get("name", "")))
+        filename = clean(str(uploaded.get("filename", "")))
+        return f"{name}/{filename}"
+
     async def get_document_statuses(self, compliance_case_id: str) -> list[dict]:
         case = await self.get_case(compliance_case_id)
         if case is None:
             raise HTTPException(status_code=404, detail="Compliance case not found")
+        return self._statuses_for_case(case)
 
+    def _statuses_for_case(self, case: dict) -> list[dict]:
         required_docs = case.get("required_documents", [])
         uploaded_docs = case.get("uploaded_documents", [])
         uploaded_index = {
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import logging
+import re
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledComplianceRules:
+    """Immutable, pre-normalized view of compliance_rules.json.
+
+    Country lanes are compiled into a hashed (origin, destination) -> verdict
+    table and the watchlist into a code -> (level, penalty) table, so route-risk
+    lookups are constant time. A reload builds a new instance and swaps it in.
+    """
+
+    LANE_SOURCE = "Configured sanctions and geopolitics restrictions"
+
+    def __init__(
+        self,
+        payload: dict,
+        normalize_country: Callable[[str], str],
+        version: str = "",
+        path: str = "",
+    ) -> None:
+        self.version = version
+        self.path = path
+        self.base_required_documents = self._compile_documents(payload.get("base_required_documents", []))
+        self.special_requirements = self._compile_special_requirements(payload.get("special_requirements", {}))
+        self.section_301_rates = dict(payload.get("section_301_rates_by_hs4", {}))
+
+        route_rules = payload.get("country_route_rules", {})
+        self.lanes: dict[tuple[str, str], dict] = {}
+        # Blocked pairs win over high-risk pairs; within a list the first entry wins.
+        self._compile_lanes(route_rules.get("blocked_pairs", []), "BLOCKED", normalize_country)
+        self._compile_lanes(route_rules.get("high_risk_pairs", []), "WARNING", normalize_country)
+        self.watchlist = self._compile_watchlist(
+            route_rules.get("watchlist_countries", {}),
+            route_rules.get("watchlist_penalties", {}),
+        )
+
+    @classmethod
+    def from_file(
+        cls,
+        path: str,
+        normalize_country: Callable[[str], str],
+    ) -> Optional["CompiledComplianceRules"]:
+        """Read and compile a rules file; None when it is missing, unreadable or mis-shaped."""
+        try:
+            with open(path, "rb") as file:
+                raw = file.read()
+            payload = json.loads(raw.decode("utf-8"))
+        except Exception as exc:
+            logger.warning("Compliance rules file unavailable (%s): %s", path, exc)
+            return None
+
+        if (
+            not isinstance(payload, dict)
+            or not isinstance(payload.get("base_required_documents", []), list)
+            or not isinstance(payload.get("special_requirements", {}), dict)
+            or not isinstance(payload.get("section_301_rates_by_hs4", {}), dict)
+            or not isinstance(payload.get("country_route_rules", {}), dict)
+        ):
+            logger.warning("Compliance rules file has invalid shape: %s", path)
+            return None
+
+        version = hashlib.sha256(raw).hexdigest()[:16]
+        return cls(payload, normalize_country, version=version, path=path)
+
+    def lane_verdict(self, origin: str, destination: str) -> Optional[dict]:
+        verdict = self.lanes.get((origin, destination))
+        return dict(verdict) if verdict is not None else None
+
+    def watchlist_verdict(self, origin: str, destination: str) -> Optional[dict]:
+        origin_level, origin_penalty = self.watchlist.get(origin, ("", 0))
+        destination_level, destination_penalty = self.watchlist.get(destination, ("", 0))
+        penalty = origin_penalty + destination_penalty
+        if penalty <= 0:
+            return None
+        return {
+            "status": "WARNING",
+            "score_penalty": min(45, penalty),
+            "details": (
+                f"Lane involves watchlist country risk (origin={origin_level or 'low'}, "
+                f"destination={destination_level or 'low'})"
+            ),
+            "action_required": "Run enhanced documentary and licensing review",
+            "source": self.LANE_SOURCE,
+        }
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "path": self.path,
+            "lanes": len(self.lanes),
+            "watchlist_countries": len(self.watchlist),
+            "section_301_prefixes": len(self.section_301_rates),
+        }
+
+    def _compile_lanes(
+        self,
+        items: list,
+        status: str,
+        normalize_country: Callable[[str], str],
+    ) -> None:
+        if not isinstance(items, list):
+            return
+        blocked = status == "BLOCKED"
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            origin = normalize_country(item.get("origin", ""))
+            destination = normalize_country(item.get("destination", ""))
+            if not origin or not destination or (origin, destination) in self.lanes:
+                continue
+
+            if blocked:
+                penalty = max(60, self._safe_int(item.get("score_penalty"), default=85))
+                reason = f"Trade lane {origin}->{destination} is highly restricted"
+                action = "Escalate to legal/compliance before shipment"
+            else:
+                penalty = max(20, self._safe_int(item.get("score_penalty"), default=35))
+                reason = f"Trade lane {origin}->{destination} has elevated regulatory and sanctions risk"
+                action = "Perform enhanced denied-party and licensing checks"
+
+            self.lanes[(origin, destination)] = {
+                "status": status,
+                "score_penalty": penalty,
+                "details": str(item.get("reason", reason)),
+                "action_required": str(item.get("action_required", action)),
+                "source": str(item.get("source", self.LANE_SOURCE)),
+            }
+
+    def _compile_watchlist(self, watchlist, penalties) -> dict[str, tuple[str, int]]:
+        if not isinstance(watchlist, dict):
+            return {}
+        if not isinstance(penalties, dict):
+            penalties = {}
+
+        compiled = {}
+        for code, level in watchlist.items():
+            level = str(level or "").strip().lower()
+            if not level:
+                continue
+            compiled[str(code).strip().upper()] = (
+                level,
+                self._safe_int(penalties.get(level), default=10),
+            )
+        return compiled
+
+    def _compile_documents(self, items) -> list[dict]:
+        documents = []
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict):
+                continue
+            name = str(item.get("name", "")).strip()
+            status = str(item.get("status", "")).strip().lower()
+            if not name:
+                continue
+            if status not in {"required", "recommended"}:
+                status = "required"
+            documents.append({"name": name, "status": status})
+        return documents
+
+    def _compile_special_requirements(self, items) -> dict[str, list[str]]:
+        compiled = {}
+        for key, requirements in (items if isinstance(items, dict) else {}).items():
+            if not isinstance(requirements, list):
+                continue
+            hs_prefix = re.sub(r"[^0-9]", "", str(key))[:4]
+            compiled[hs_prefix] = [str(item).strip() for item in requirements if str(item).strip()]
+        return compiled
+
+    @staticmethod
+    def _safe_int(value, default: int = 0) -> int:
+        try:
+            return int(value)
+        except Exception:
+            return default
@@ -1,10 +1,42 @@
-from pydantic import BaseModel
-from typing import Optional
+import asyncio
+import csv
+import io
+import copy
+import itertools
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Iterable, Optional
 
+from fastapi import HTTPException, UploadFile
+from pydantic import BaseModel, Field
+
+from ..core.config import env_float
 from .compliance_document_service import compliance_document_service
 from .live_data_service import live_data_service
 
 
+class _LimitedReader(io.RawIOBase):
+    """Read-only view of an upload that fails with 413 once ``limit`` bytes have been read."""
+
+    def __init__(self, raw, limit: int) -> None:
+        self._raw = raw
+        self._limit = limit
+        self._consumed = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._raw.read(len(buffer))
+        self._consumed += len(data)
+        if self._consumed > self._limit:
+            raise HTTPException(status_code=413, detail="File exceeds 25MB limit")
+        buffer[:len(data)] = data
+        return len(data)
+
+
 class ComplianceRequest(BaseModel):
     hs_code: str
     origin_country: str
@@ -23,25 +55,295 @@ class ComplianceResult(BaseModel):
     compliance_case_id: Optional[str] = None
 
 
+class PortfolioLine(ComplianceRequest):
+    line_id: Optional[str] = None
+
+
+class PortfolioComplianceRequest(BaseModel):
+    lines: list[PortfolioLine] = Field(min_length=1, max_length=5000)
+    persist_cases: bool = True
+
+
 class ComplianceService:
     """Trade compliance checking service"""
 
+    SCREENING_NAME_FIELDS = (
+        "name",
+        "entity",
+        "entity_name",
+        "supplier_name",
+        "consignee",
+        "consignee_name",
+        "counterparty",
+    )
+    SCREENING_CHUNK_SIZE = 500
+    SCREENING_WORKERS = 4
+    MAX_SCREENING_UPLOAD_BYTES = 25 * 1024 * 1024
+    SCREENING_READ_BYTES = 64 * 1024
+
+    RESULT_CACHE_MAX_ENTRIES = 2048
+    PORTFOLIO_CONCURRENCY = 16
+
+    def __init__(self) -> None:
+        # (hs4, origin, destination, supplier) -> (expires_at, data_version, lane result)
+        self._result_cache: OrderedDict[tuple, tuple[float, tuple, dict]] = OrderedDict()
+        self._result_cache_ttl = env_float("COMPLIANCE_CACHE_SECONDS", 300.0)
+        self._result_cache_stats = {"hits": 0, "misses": 0}
+
     async def check_compliance(self, request: ComplianceRequest) -> ComplianceResult:
         """Run compliance checks"""
+        key = self._result_cache_key(request)
+        version = live_data_service.get_screening_data_version()
+        lane = self._cached_result(key, version)
+        if lane is None:
+            lane = await self._evaluate_lane(request, key)
+            self._store_result(key, version, lane)
+
+        checks = lane["checks"]
+        for check in checks:
+            if check["category"] == "OFAC Sanctions" and "checked_entities" in check:
+                check["checked_entities"] = [request.supplier_name]
+
+        # Persist case and merge uploaded document statuses in one storage round trip.
+        required_docs = lane["required_documents"]
+        compliance_case_id, statuses = await compliance_document_service.sync_case_statuses(
+            compliance_case_id=request.compliance_case_id or "",
+            request_payload=request.model_dump(),
+            required_documents=required_docs,
+        )
+        if statuses is not None:
+            required_docs = statuses
+
+        return ComplianceResult(
+            overall_risk_score=max(0, lane["risk_score"]),
+            risk_level=lane["risk_level"],
+            checks=checks,
+            required_documents=required_docs,
+            warnings=lane["warnings"],
+            compliance_case_id=compliance_case_id,
+        )
+
+    async def check_portfolio(self, request: PortfolioComplianceRequest) -> dict:
+        """Evaluate every PO line, doing each supplier, route and HS4 lookup only once."""
+        started = time.perf_counter()
+        version = live_data_service.get_screening_data_version()
+        keys = [self._result_cache_key(line) for line in request.lines]
+
+        lanes: dict[tuple, dict] = {}
+        pending: dict[tuple, PortfolioLine] = {}
+        for key, line in zip(keys, request.lines):
+            if key in lanes or key in pending:
+                continue
+            cached = self._cached_result(key, version)
+            if cached is not None:
+                lanes[key] = cached
+            else:
+                pending[key] = line
+        cache_hits = len(lanes)
+
+        if pending:
+            evaluated = await self._evaluate_lanes(pending)
+            for key, lane in evaluated.items():
+                self._store_result(key, version, lane)
+            lanes.update(evaluated)
+
+        results = []
+        for position, (key, line) in enumerate(zip(keys, request.lines)):
+            lane = copy.deepcopy(lanes[key])
+            for check in lane["checks"]:
+                if check["category"] == "OFAC Sanctions" and "checked_entities" in check:
+                    check["checked_entities"] = [line.supplier_name]
+            results.append(
+                {
+                    "line": position,
+                    "line_id": line.line_id,
+                    "hs_code": line.hs_code,
+                    "origin_country": line.origin_country,
+                    "destination_country": line.destination_country,
+                    "supplier_name": line.supplier_name,
+                    "overall_risk_score": max(0, lane["risk_score"]),
+                    "risk_level": lane["risk_level"],
+                    "checks": lane["checks"],
+                    "required_documents": lane["required_documents"],
+                    "warnings": lane["warnings"],
+                    "compliance_case_id": None,
+                }
+            )
+
+        if request.persist_cases:
+            synced = await compliance_document_service.sync_cases_bulk(
+                [
+                    (
+                        line.compliance_case_id or "",
+                        line.model_dump(exclude={"line_id"}),
+                        result["required_documents"],
+                    )
+                    for line, result in zip(request.lines, results)
+                ]
+            )
+            for result, (case_id, statuses, error) in zip(results, synced or []):
+                if error:
+                    result["case_error"] = error
+                    continue
+                result["compliance_case_id"] = case_id
+                result["required_documents"] = statuses
+
+        return {
+            "summary": self._portfolio_summary(keys, results, cache_hits, len(pending), started),
+            "lines": results,
+        }
+
+    async def _evaluate_lanes(self, pending: dict[tuple, PortfolioLine]) -> dict[tuple, dict]:
+        suppliers: dict[str, str] = {}
+        routes: dict[tuple, tuple[str, str]] = {}
+        section_301_calls: dict[tuple, tuple[str, str]] = {}
+        for (hs4, origin, destination, supplier), line in pending.items():
+            if supplier is not None:
+                suppliers.setdefault(supplier, line.supplier_name)
+            routes.setdefault((origin, destination), (line.origin_country, line.destination_country))
+            if destination == "US":
+                section_301_calls.setdefault((hs4, origin), (line.hs_code, line.origin_country))
+
+        index = await live_data_service.get_ofac_index() if suppliers else None
+        semaphore = asyncio.Semaphore(self.PORTFOLIO_CONCURRENCY)
+
+        async def bounded(call):
+            async with semaphore:
+                return await call
+
+        screened, route_results, section_301_results = await asyncio.gather(
+            asyncio.to_thread(
+                lambda: {
+                    normalized: live_data_service.screen_ofac_with_index(index, name)
+                    for normalized, name in suppliers.items()
+                }
+            ),
+            asyncio.gather(
+                *[bounded(live_data_service.get_country_route_risk(*raw)) for raw in routes.values()]
+            ),
+            asyncio.gather(
+                *[bounded(live_data_service.get_section_301_status(*raw)) for raw in section_301_calls.values()]
+            ),
+        )
+        route_index = dict(zip(routes, route_results))
+        section_301_index = dict(zip(section_301_calls, section_301_results))
+        special_index = {
+            hs4: live_data_service.get_special_requirements(hs4) for hs4 in {key[0] for key in pending}
+        }
+
+        lanes = {}
+        for key, line in pending.items():
+            hs4, origin, destination, supplier = key
+            if supplier is None:
+                ofac_result = await self._check_ofac(None)
+            else:
+                ofac_result = self._ofac_check(line.supplier_name, screened[supplier])
+            lanes[key] = self._assemble_lane(
+                key,
+                ofac_result,
+                route_index[(origin, destination)],
+                section_301_index.get((hs4, origin), {"applies": False}),
+                special_index[hs4],
+            )
+        return lanes
+
+    def _portfolio_summary(
+        self,
+        keys: list[tuple],
+        results: list[dict],
+        cache_hits: int,
+        evaluated: int,
+        started: float,
+    ) -> dict:
+        risk_levels = {"LOW": 0, "MEDIUM": 0, "HIGH": 0}
+        warnings: dict[str, int] = {}
+        flagged_suppliers: dict[str, dict] = {}
+        section_301_lines = 0
+        for result in results:
+            risk_levels[result["risk_level"]] = risk_levels.get(result["risk_level"], 0) + 1
+            for warning in result["warnings"]:
+                warnings[warning] = warnings.get(warning, 0) + 1
+            for check in result["checks"]:
+                if check["category"] == "Section 301 Tariffs":
+                    section_301_lines += 1
+                elif check["category"] == "OFAC Sanctions" and check["status"] in {"BLOCKED", "POTENTIAL_MATCH"}:
+                    flagged = flagged_suppliers.setdefault(
+                        result["supplier_name"],
+                        {"supplier_name": result["supplier_name"], "details": check["details"], "lines": []},
+                    )
+                    flagged["lines"].append(result["line"])
+
+        scores = [result["overall_risk_score"] for result in results]
+        highest_risk = sorted(results, key=lambda item: item["overall_risk_score"])[:10]
+        return {
+            "total_lines": len(results),
+            "distinct_lanes": len(set(keys)),
+            "distinct_suppliers": len({key[3] for key in keys if key[3] is not None}),
+            "distinct_hs4": len({key[0] for key in keys}),
+            "distinct_routes": len({(key[1], key[2]) for key in keys}),
+            "evaluated_lanes": evaluated,
+            "cached_lanes": cache_hits,
+            "risk_levels": risk_levels,
+            "average_risk_score": round(sum(scores) / len(scores), 1) if scores else 0.0,
+            "min_risk_score": min(scores) if scores else 0,
+            "section_301_lines": section_301_lines,
+            "sanctions_flags": list(flagged_suppliers.values()),
+            "case_sync_errors": [result["line"] for result in results if result.get("case_error")],
+            "warnings": [
+                {"message": message, "lines": count}
+                for message, count in sorted(warnings.items(), key=lambda item: -item[1])
+            ],
+            "highest_risk_lines": [
+                {
+                    "line": item["line"],
+                    "line_id": item["line_id"],
+                    "overall_risk_score": item["overall_risk_score"],
+                    "risk_level": item["risk_level"],
+                }
+                for item in highest_risk
+            ],
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    def get_result_cache_stats(self) -> dict:
+        return {
+            "entries": len(self._result_cache),
+            "max_entries": self.RESULT_CACHE_MAX_ENTRIES,
+            "ttl_seconds": self._result_cache_ttl,
+            **self._result_cache_stats,
+        }
+
+    async def _evaluate_lane(self, request: ComplianceRequest, key: tuple) -> dict:
+        """Evaluate the case-independent checks for one (HS4, lane, supplier) combination."""
+        # OFAC screening, route risk and Section 301 do not depend on each other.
+        ofac_result, route_risk, section_301 = await asyncio.gather(
+            self._check_ofac(request.supplier_name),
+            live_data_service.get_country_route_risk(
+                request.origin_country, request.destination_country
+            ),
+            live_data_service.get_section_301_status(request.hs_code, request.origin_country),
+        )
+        special_requirements = live_data_service.get_special_requirements(request.hs_code)
+        return self._assemble_lane(key, ofac_result, route_risk, section_301, special_requirements)
+
+    def _assemble_lane(
+        self,
+        key: tuple,
+        ofac_result: dict,
+        route_risk: dict,
+        section_301: dict,
+        special_requirements: list[str],
+    ) -> dict:
+        hs4, _, destination, _ = key
         checks = []
         warnings = []
         risk_score = 100
 
-        # OFAC Screening
-        ofac_result = await self._check_ofac(request.supplier_name)
         checks.append(ofac_result)
         if ofac_result["status"] in {"BLOCKED", "POTENTIAL_MATCH"}:
             risk_score -= 50
 
         # Geopolitical route risk for origin -> destination lane.
-        route_risk = await live_data_service.get_country_route_risk(
-            request.origin_country, request.destination_country
-        )
         route_status = route_risk.get("status", "CLEAR")
         if route_status in {"WARNING", "BLOCKED"}:
             checks.append(
@@ -66,10 +368,7 @@ class ComplianceService:
             )
 
         # Section 301 check
-        section_301 = await live_data_service.get_section_301_status(
-            request.hs_code, request.origin_country
-        )
-        if request.destination_country == "US" and section_301.get("applies"):
+        if destination == "US" and section_301.get("applies"):
             checks.append(
                 {
                     "category": "Section 301 Tariffs",
@@ -82,13 +381,12 @@ class ComplianceService:
             warnings.append(section_301.get("message", "Section 301 tariffs may apply"))
 
         # Special documentation requirements
-        special_requirements = live_data_service.get_special_requirements(request.hs_code)
         if special_requirements:
             checks.append(
                 {
                     "category": "Special Documentation",
                     "status": "ACTION_REQUIRED",
-                    "details": f"Additional documents required for HS {request.hs_code[:4]}",
+                    "details": f"Additional documents required for HS {hs4}",
                     "documents": special_requirements,
                 }
             )
@@ -110,30 +408,42 @@ class ComplianceService:
             for doc in special_requirements:
                 required_docs.append({"name": doc, "status": "required"})
 
-        # Persist case and merge uploaded document statuses from storage.
-        compliance_case_id = await compliance_document_service.sync_case_requirements(
-            compliance_case_id=request.compliance_case_id or "",
-            request_payload=request.model_dump(),
-            required_documents=required_docs,
-        )
-        if compliance_case_id:
-            try:
-                required_docs = await compliance_document_service.get_document_statuses(
-                    compliance_case_id
-                )
-            except Exception:
-                # Keep calculation resilient even if storage is temporarily unavailable.
-                pass
+        return {
+            "checks": checks,
+            "warnings": warnings,
+            "risk_score": risk_score,
+            "risk_level": risk_level,
+            "required_documents": required_docs,
+        }
 
-        return ComplianceResult(
-            overall_risk_score=max(0, risk_score),
-            risk_level=risk_level,
-            checks=checks,
-            required_documents=required_docs,
-            warnings=warnings,
-            compliance_case_id=compliance_case_id,
+    def _result_cache_key(self, request: ComplianceRequest) -> tuple:
+        return (
+            re.sub(r"[^0-9]", "", request.hs_code)[:4],
+            (request.origin_country or "").strip().upper(),
+            (request.destination_country or "").strip().upper(),
+            live_data_service.normalize_entity_name(request.supplier_name) if request.supplier_name else None,
         )
 
+    def _cached_result(self, key: tuple, version: tuple) -> Optional[dict]:
+        entry = self._result_cache.get(key)
+        if entry is not None:
+            expires_at, cached_version, lane = entry
+            if expires_at > time.monotonic() and cached_version == version:
+                self._result_cache.move_to_end(key)
+                self._result_cache_stats["hits"] += 1
+                return copy.deepcopy(lane)
+            self._result_cache.pop(key, None)
+        self._result_cache_stats["misses"] += 1
+        return None
+
+    def _store_result(self, key: tuple, version: tuple, lane: dict) -> None:
+        if self._result_cache_ttl <= 0:
+            return
+        self._result_cache[key] = (time.monotonic() + self._result_cache_ttl, version, copy.deepcopy(lane))
+        self._result_cache.move_to_end(key)
+        while len(self._result_cache) > self.RESULT_CACHE_MAX_ENTRIES:
+            self._result_cache.popitem(last=False)
+
     async def _check_ofac(self, entity_name: Optional[str]) -> dict:
         """Check entity against OFAC SDN list"""
         if not entity_name:
@@ -144,16 +454,155 @@ class ComplianceService:
             }
 
         result = await live_data_service.screen_ofac(entity_name)
+        return self._ofac_check(entity_name, result)
+
+    def _ofac_check(self, entity_name: str, result: dict) -> dict:
         status = result.get("status", "CLEAR")
         mapped_status = "BLOCKED" if status == "POTENTIAL_MATCH" else status
 
-        return {
+        check = {
             "category": "OFAC Sanctions",
             "status": mapped_status,
             "details": result.get("message", "No matches found in screening"),
             "checked_entities": [entity_name],
             "source": result.get("source", "Simplified OFAC keyword screening"),
         }
+        if result.get("candidates"):
+            check["match_candidates"] = result["candidates"]
+        return check
+
+    async def read_screening_upload(self, file: UploadFile) -> list[str]:
+        """Extract counterparty names from a CSV or NDJSON upload, one buffered chunk at a time."""
+        head = await file.read(self.SCREENING_READ_BYTES)
+        if not head:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty")
+        await file.seek(0)
+
+        filename = (file.filename or "").lower()
+        content_type = (file.content_type or "").lower()
+        is_ndjson = (
+            filename.endswith((".ndjson", ".jsonl"))
+            or "ndjson" in content_type
+            or "jsonl" in content_type
+            or head.decode("utf-8-sig", errors="replace").lstrip().startswith("{")
+        )
+        # The spooled body may be on disk, so parse off the event loop.
+        names = await asyncio.to_thread(self._parse_screening_file, file.file, is_ndjson)
+        if not names:
+            raise HTTPException(status_code=400, detail="No counterparty names found in upload")
+        return names
+
+    def _parse_screening_file(self, raw, is_ndjson: bool) -> list[str]:
+        reader = _LimitedReader(raw, self.MAX_SCREENING_UPLOAD_BYTES)
+        text = io.TextIOWrapper(
+            io.BufferedReader(reader, buffer_size=self.SCREENING_READ_BYTES),
+            encoding="utf-8-sig",
+            errors="replace",
+            newline="",
+        )
+        return self._parse_ndjson_names(text) if is_ndjson else self._parse_csv_names(text)
+
+    async def screen_entities_stream(self, names: list[str]) -> AsyncIterator[str]:
+        """Screen many names against one SDN snapshot, yielding NDJSON lines as chunks finish."""
+        started = time.perf_counter()
+        unique: dict[str, dict] = {}
+        for name in names:
+            normalized = live_data_service.normalize_entity_name(name)
+            if not normalized:
+                continue
+            item = unique.setdefault(normalized, {"entity": name, "occurrences": 0})
+            item["occurrences"] += 1
+
+        index = await live_data_service.get_ofac_index()
+        keys = list(unique)
+        chunks = [
+            keys[offset:offset + self.SCREENING_CHUNK_SIZE]
+            for offset in range(0, len(keys), self.SCREENING_CHUNK_SIZE)
+        ]
+        semaphore = asyncio.Semaphore(self.SCREENING_WORKERS)
+
+        async def run_chunk(chunk: list[str]) -> list[dict]:
+            async with semaphore:
+                return await asyncio.to_thread(self._screen_chunk, index, chunk, unique)
+
+        matches = 0
+        tasks = [asyncio.create_task(run_chunk(chunk)) for chunk in chunks]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                for row in await finished:
+                    if row["status"] == "POTENTIAL_MATCH":
+                        matches += 1
+                    yield json.dumps(row) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        yield json.dumps(
+            {
+                "type": "summary",
+                "total_rows": len(names),
+                "unique_names": len(keys),
+                "potential_matches": matches,
+                "sdn_entries": len(index) if index is not None else 0,
+                "source": "OFAC SDN CSV" if index is not None else "Fallback keyword screening",
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+        ) + "\n"
+
+    def _screen_chunk(self, index, chunk: list[str], unique: dict[str, dict]) -> list[dict]:
+        rows = []
+        for normalized in chunk:
+            item = unique[normalized]
+            result = live_data_service.screen_ofac_with_index(index, item["entity"])
+            rows.append(
+                {
+                    "type": "result",
+                    "normalized_name": normalized,
+                    "occurrences": item["occurrences"],
+                    **result,
+                }
+            )
+        return rows
+
+    def _parse_csv_names(self, lines: Iterable[str]) -> list[str]:
+        rows = csv.reader(lines)
+        first = next(rows, None)
+        if first is None:
+            return []
+
+        header = [cell.strip().lower() for cell in first]
+        column = next(
+            (header.index(field) for field in self.SCREENING_NAME_FIELDS if field in header),
+            None,
+        )
+        if column is None:
+            column = 0
+            rows = itertools.chain([first], rows)
+
+        return [row[column].strip() for row in rows if len(row) > column and row[column].strip()]
+
+    def _parse_ndjson_names(self, lines: Iterable[str]) -> list[str]:
+        names = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, str):
+                value = record
+            elif isinstance(record, dict):
+                value = next(
+                    (record[field] for field in self.SCREENING_NAME_FIELDS if record.get(field)),
+                    "",
+                )
+            else:
+                continue
+            if str(value).strip():
+                names.append(str(value).strip())
+        return names
 
 
 compliance_service = ComplianceService()
@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CountryGeoTable:
+    """ISO-3166 alpha-2 centroid/region table kept entirely in memory.
+
+    The bundled file ships with the app; refreshed restcountries records are
+    written to an overlay file next to the other runtime caches so every
+    worker and every restart sees the same data without a network call.
+    """
+
+    def __init__(self, bundled_path: str, overlay_path: str) -> None:
+        self.bundled_path = bundled_path
+        self.overlay_path = overlay_path
+
+        overlay_payload = self._read_json(overlay_path)
+        self.refreshed_at: Optional[float] = overlay_payload.get("refreshed_at")
+        self._overlay = self._parse_rows(overlay_payload)
+        self._rows = {**self._parse_rows(self._read_json(bundled_path)), **self._overlay}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, code: str) -> Optional[dict]:
+        row = self._rows.get(code)
+        if row is None:
+            return None
+        lat, lon, region, subregion = row
+        return {
+            "code": code,
+            "lat": lat,
+            "lon": lon,
+            "region": region,
+            "subregion": subregion,
+            "source": "restcountries" if code in self._overlay else "ISO-3166 bundled table",
+        }
+
+    def apply_restcountries(self, records: list[dict], fetched_at: float) -> int:
+        """Merge a restcountries /all payload; returns how many rows changed."""
+        updates = {}
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            code = str(record.get("cca2", "")).strip().upper()
+            latlng = record.get("latlng")
+            if len(code) != 2 or not isinstance(latlng, list) or len(latlng) < 2:
+                continue
+            try:
+                row = self._row(latlng[0], latlng[1], record.get("region"), record.get("subregion"))
+            except (TypeError, ValueError):
+                continue
+            if self._rows.get(code) != row:
+                updates[code] = row
+
+        self.refreshed_at = fetched_at
+        if not updates:
+            self._persist_overlay()
+            return 0
+
+        # Build new dicts and swap references; readers never see a partial merge.
+        overlay = {**self._overlay, **updates}
+        self._rows = {**self._rows, **updates}
+        self._overlay = overlay
+        self._persist_overlay()
+        return len(updates)
+
+    def stats(self) -> dict:
+        return {
+            "countries": len(self._rows),
+            "overlay_countries": len(self._overlay),
+            "refreshed_at": self.refreshed_at,
+            "overlay_path": self.overlay_path,
+        }
+
+    def _read_json(self, path: str) -> dict:
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                payload = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except Exception as exc:
+            logger.warning("Country geo table unreadable (%s): %s", path, exc)
+            return {}
+        return payload if isinstance(payload, dict) else {}
+
+    def _parse_rows(self, payload: dict) -> dict[str, tuple[float, float, str, str]]:
+        rows = {}
+        for code, item in (payload.get("countries") or {}).items():
+            try:
+                rows[str(code).upper()] = self._row(*item[:4])
+            except (TypeError, ValueError):
+                continue
+        return rows
+
+    def _persist_overlay(self) -> None:
+        payload = {
+            "refreshed_at": self.refreshed_at,
+            "countries": {code: list(row) for code, row in sorted(self._overlay.items())},
+        }
+        tmp_path = f"{self.overlay_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.overlay_path)), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(payload, file)
+            os.replace(tmp_path, self.overlay_path)
+        except OSError as exc:
+            logger.warning("Country geo overlay could not be persisted (%s): %s", self.overlay_path, exc)
+
+    @staticmethod
+    def _row(lat, lon, region, subregion) -> tuple[float, float, str, str]:
+        return (
+            float(lat),
+            float(lon),
+            str(region or "").strip().upper(),
+            str(subregion or "").strip().upper(),
+        )
@@ -0,0 +1,191 @@
+from datetime import datetime
+from typing import Iterable
+
+import numpy as np
+
+STATUSES = ("IN_TRANSIT", "ARRIVAL_AT_DESTINATION", "CUSTOMS_CLEARANCE", "DELIVERED")
+
+
+class FleetEngine:
+    """Vectorized schedule and position evaluation for a whole container fleet.
+
+    Mirrors CargoService._build_schedule and _interpolate_position so a fleet row
+    equals the matching single track_shipment call. Route polylines are stored
+    as C x P arrays padded with the last point (cumulative distance +inf), and
+    per-container seeds are pre-reduced modulo their cycle so the schedule stays
+    in int64 arithmetic.
+    """
+
+    POST_ARRIVAL_SECONDS = 4 * 24 * 3600
+    ARRIVAL_SECONDS = 18 * 3600
+    CUSTOMS_SECONDS = 72 * 3600
+
+    def __init__(self) -> None:
+        self.containers: list[str] = []
+        self.index: dict[str, int] = {}
+        self.profiles: list[dict] = []
+        self.point_names: list[list[str]] = []
+        self._pending: dict[str, object] = {}
+        self._lat = np.zeros((0, 1))
+        self._lon = np.zeros((0, 1))
+        self._cum = np.zeros((0, 1))
+        self._n_points = np.zeros(0, dtype=np.int64)
+        self._transit = np.zeros(0, dtype=np.int64)
+        self._cycle = np.ones(0, dtype=np.int64)
+        self._seed_phase = np.zeros(0, dtype=np.int64)
+        self._seed_speed = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.containers) + len(self._pending)
+
+    def __contains__(self, container: str) -> bool:
+        return container in self.index or container in self._pending
+
+    def add(self, entries: Iterable[tuple[str, object]]) -> None:
+        """Queue (container_id, ShipmentGeometry) pairs; arrays are rebuilt on the next evaluate."""
+        for container, geometry in entries:
+            if container not in self.index:
+                self._pending[container] = geometry
+
+    def evaluate(self, now: datetime) -> dict[str, np.ndarray]:
+        """Progress, position, heading, speed and status for every container at ``now``."""
+        self._flush()
+        count = len(self.containers)
+        if not count:
+            return {}
+        now_ts = int(now.timestamp())
+
+        phase = (now_ts % self._cycle + self._seed_phase) % self._cycle
+        progress = np.minimum(phase / self._transit, 1.0)
+        arrived_seconds = np.maximum(0, phase - self._transit)
+
+        rows = np.arange(count)
+        last = self._n_points - 1
+        total = self._cum[rows, last]
+        total = np.where(total > 0, total, 1.0)
+        target = total * progress
+
+        # First segment whose end reaches the target; 0 when none does (degenerate route).
+        reached = self._cum[:, 1:] >= target[:, None]
+        found = reached.any(axis=1)
+        segment = np.where(found, reached.argmax(axis=1), 0)
+        following = np.minimum(segment + 1, last)
+
+        start_lat, start_lon = self._lat[rows, segment], self._lon[rows, segment]
+        end_lat, end_lon = self._lat[rows, following], self._lon[rows, following]
+        segment_total = np.maximum(0.001, self._cum[rows, following] - self._cum[rows, segment])
+        fraction = np.clip((target - self._cum[rows, segment]) / segment_total, 0.0, 1.0)
+
+        lat = start_lat + (end_lat - start_lat) * fraction
+        lon = start_lon + (end_lon - start_lon) * fraction
+        heading = self._bearing(start_lat, start_lon, end_lat, end_lon)
+        speed = 13.8 + ((self._seed_speed + (now_ts // 600) % 80) % 80) / 10
+
+        departing = progress <= 0
+        arrived = progress >= 1
+        lat = np.where(departing, self._lat[:, 0], np.where(arrived, self._lat[rows, last], lat))
+        lon = np.where(departing, self._lon[:, 0], np.where(arrived, self._lon[rows, last], lon))
+        heading = np.where(departing, 90, np.where(arrived, 0, heading))
+        speed = np.where(departing, 9.5, np.where(arrived, 0.8, speed))
+
+        status = np.select(
+            [
+                progress < 1.0,
+                arrived_seconds < self.ARRIVAL_SECONDS,
+                arrived_seconds < self.CUSTOMS_SECONDS,
+            ],
+            [0, 1, 2],
+            default=3,
+        )
+
+        return {
+            "phase_seconds": phase,
+            "transit_seconds": self._transit,
+            "progress": progress,
+            "latitude": np.round(lat, 5),
+            "longitude": np.round(lon, 5),
+            "heading": heading.astype(np.int64),
+            "speed_knots": np.round(speed, 1),
+            "segment": segment,
+            "following": following,
+            "fraction": fraction,
+            "status": status,
+        }
+
+    def location_name(self, row: int, fleet: dict[str, np.ndarray]) -> str:
+        names = self.point_names[row]
+        progress = fleet["progress"][row]
+        if progress <= 0:
+            return f"Departed {names[0]}"
+        if progress >= 1:
+            return f"At {names[-1]}"
+
+        start = names[fleet["segment"][row]]
+        end = names[fleet["following"][row]]
+        fraction = fleet["fraction"][row]
+        if fraction < 0.25:
+            return f"Near {start}"
+        if fraction > 0.75:
+            return f"Approaching {end}"
+        return f"Between {start} and {end}"
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = list(self._pending.items()), {}
+
+        width = max([self._lat.shape[1]] + [len(geometry.route_points) for _, geometry in pending])
+        lat = np.empty((len(pending), width))
+        lon = np.empty((len(pending), width))
+        cum = np.full((len(pending), width), np.inf)
+        n_points, transit, cycle, seed_phase, seed_speed = [], [], [], [], []
+        for row, (container, geometry) in enumerate(pending):
+            points = geometry.route_points
+            count = len(points)
+            lat[row, :count] = [point["lat"] for point in points]
+            lon[row, :count] = [point["lon"] for point in points]
+            lat[row, count:] = points[-1]["lat"]
+            lon[row, count:] = points[-1]["lon"]
+            cum[row, :count] = geometry.cumulative_km
+
+            transit_seconds = max(1, int(geometry.profile["transit_days"] * 24 * 3600))
+            cycle_seconds = transit_seconds + self.POST_ARRIVAL_SECONDS
+            n_points.append(count)
+            transit.append(transit_seconds)
+            cycle.append(cycle_seconds)
+            seed_phase.append(geometry.seed % cycle_seconds)
+            seed_speed.append(geometry.seed % 80)
+
+            self.index[container] = len(self.containers)
+            self.containers.append(container)
+            self.profiles.append(geometry.profile)
+            self.point_names.append([point["name"] for point in points])
+
+        self._lat = np.vstack([self._pad(self._lat, width, edge=True), lat])
+        self._lon = np.vstack([self._pad(self._lon, width, edge=True), lon])
+        self._cum = np.vstack([self._pad(self._cum, width, edge=False), cum])
+        self._n_points = np.concatenate([self._n_points, np.array(n_points, dtype=np.int64)])
+        self._transit = np.concatenate([self._transit, np.array(transit, dtype=np.int64)])
+        self._cycle = np.concatenate([self._cycle, np.array(cycle, dtype=np.int64)])
+        self._seed_phase = np.concatenate([self._seed_phase, np.array(seed_phase, dtype=np.int64)])
+        self._seed_speed = np.concatenate([self._seed_speed, np.array(seed_speed, dtype=np.int64)])
+
+    def _pad(self, values: np.ndarray, width: int, edge: bool) -> np.ndarray:
+        extra = width - values.shape[1]
+        if not len(values):
+            return np.zeros((0, width))
+        if extra <= 0:
+            return values
+        if edge:
+            return np.pad(values, ((0, 0), (0, extra)), mode="edge")
+        return np.pad(values, ((0, 0), (0, extra)), constant_values=np.inf)
+
+    def _bearing(self, lat1, lon1, lat2, lon2) -> np.ndarray:
+        phi1 = np.radians(lat1)
+        phi2 = np.radians(lat2)
+        d_lambda = np.radians(lon2 - lon1)
+
+        x = np.sin(d_lambda) * np.cos(phi2)
+        y = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(d_lambda)
+        bearing = np.degrees(np.arctan2(x, y))
+        return np.mod(bearing + 360, 360).astype(np.int64)
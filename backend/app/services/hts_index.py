@@ -0,0 +1,262 @@
+import csv
+import io
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HtsIndex:
+    """Local SQLite index over a full USITC HTS release export."""
+
+    CSV_COLUMNS = {
+        "hts number": "htsno",
+        "indent": "indent",
+        "description": "description",
+        "unit of quantity": "units",
+        "general rate of duty": "general",
+        "special rate of duty": "special",
+        "column 2 rate of duty": "other",
+    }
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._retired: list[sqlite3.Connection] = []
+        self._release: Optional[str] = None
+        self._loaded_at: Optional[float] = None
+        self._row_count = 0
+        self._open_existing()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._conn is not None and self._row_count > 0
+
+    @property
+    def release(self) -> Optional[str]:
+        return self._release
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.is_loaded,
+            "release": self._release,
+            "rows": self._row_count,
+            "loaded_at": self._loaded_at,
+            "path": self.path,
+        }
+
+    def lookup(self, hs_code: str) -> Optional[dict]:
+        """Resolve an HS code the same way as `_pick_best_result` on live search rows.
+
+        Exact dotted HTS number first, then the longest indexed prefix of the input,
+        then the first schedule row underneath the input digits.
+        """
+        conn = self._conn
+        if conn is None:
+            return None
+
+        clean_code = re.sub(r"[^0-9]", "", hs_code or "")
+        if not clean_code:
+            return None
+        dotted_input = hs_code.strip() if "." in hs_code else self.format_hs(clean_code)
+
+        row = conn.execute(
+            "SELECT * FROM hts WHERE htsno = ? LIMIT 1",
+            (dotted_input,),
+        ).fetchone()
+        if row is None:
+            prefixes = [clean_code[:size] for size in range(len(clean_code), 3, -1)]
+            if prefixes:
+                placeholders = ",".join("?" for _ in prefixes)
+                row = conn.execute(
+                    f"SELECT * FROM hts WHERE digits IN ({placeholders}) "
+                    "ORDER BY length(digits) DESC, seq LIMIT 1",
+                    prefixes,
+                ).fetchone()
+        if row is None:
+            row = conn.execute(
+                "SELECT * FROM hts WHERE digits >= ? AND digits < ? ORDER BY seq LIMIT 1",
+                (clean_code, f"{clean_code}:"),
+            ).fetchone()
+        if row is None:
+            return None
+        return self._row_to_dict(row)
+
+    def load_release(self, rows: Iterable[dict], release: str) -> int:
+        """Build a new release into a side file and swap it in atomically.
+
+        The replaced connection is only retired here, since lookups may still be
+        using it; the owner closes it with ``close_retired`` once they are done.
+        """
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        count = self._build_file(tmp_path, rows, release)
+        if count == 0:
+            os.remove(tmp_path)
+            raise ValueError("HTS release contained no usable rows")
+
+        with self._lock:
+            os.replace(tmp_path, self.path)
+            previous = self._conn
+            self._open_existing()
+            if previous is not None:
+                self._retired.append(previous)
+
+        logger.info("HTS release %s indexed with %d rows", release, count)
+        return count
+
+    def close_retired(self) -> None:
+        with self._lock:
+            retired, self._retired = self._retired, []
+        for conn in retired:
+            conn.close()
+
+    def parse_export(self, payload: str | bytes, fmt: str = "") -> list[dict]:
+        """Parse a USITC JSON or CSV export into plain row dicts."""
+        text = payload.decode("utf-8-sig") if isinstance(payload, bytes) else payload
+        fmt = (fmt or "").strip().lower()
+        if not fmt:
+            fmt = "json" if text.lstrip().startswith(("[", "{")) else "csv"
+
+        if fmt == "json":
+            data = json.loads(text)
+            if isinstance(data, dict):
+                data = data.get("results") or data.get("HTS") or []
+            return [row for row in data if isinstance(row, dict)]
+
+        rows = []
+        for record in csv.DictReader(io.StringIO(text)):
+            row = {}
+            for column, value in record.items():
+                key = self.CSV_COLUMNS.get(str(column or "").strip().lower())
+                if key:
+                    row[key] = value
+            if row:
+                rows.append(row)
+        return rows
+
+    def format_hs(self, clean_code: str) -> str:
+        if len(clean_code) >= 10:
+            return f"{clean_code[:4]}.{clean_code[4:6]}.{clean_code[6:8]}.{clean_code[8:10]}"
+        if len(clean_code) == 8:
+            return f"{clean_code[:4]}.{clean_code[4:6]}.{clean_code[6:8]}"
+        if len(clean_code) == 6:
+            return f"{clean_code[:4]}.{clean_code[4:6]}"
+        return clean_code
+
+    def _open_existing(self) -> None:
+        if not os.path.exists(self.path):
+            self._conn = None
+            return
+        try:
+            conn = sqlite3.connect(
+                f"file:{self.path}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA mmap_size = 268435456")
+            meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        except sqlite3.Error as exc:
+            logger.warning("HTS index unreadable (%s): %s", self.path, exc)
+            self._conn = None
+            return
+
+        self._conn = conn
+        self._release = meta.get("release")
+        self._loaded_at = float(meta.get("loaded_at", 0) or 0)
+        self._row_count = int(meta.get("row_count", 0) or 0)
+
+    def _build_file(self, path: str, rows: Iterable[dict], release: str) -> int:
+        records = []
+        for seq, row in enumerate(rows):
+            htsno = str(row.get("htsno", "") or "").strip()
+            digits = re.sub(r"[^0-9]", "", htsno)
+            if not digits:
+                continue
+            units = row.get("units", "")
+            if isinstance(units, list):
+                units = ", ".join(str(unit) for unit in units if unit)
+            records.append(
+                [
+                    seq,
+                    htsno,
+                    digits,
+                    str(row.get("description", "") or "").strip(),
+                    str(row.get("general", "") or "").strip(),
+                    str(row.get("special", "") or "").strip(),
+                    str(row.get("other", "") or "").strip(),
+                    str(units or "").strip(),
+                ]
+            )
+
+        # Statistical suffix lines carry no rate of their own; they inherit the
+        # general rate of the nearest superior line.
+        rated = {record[2]: record[4] for record in records if record[4]}
+        for record in records:
+            if record[4]:
+                continue
+            for size in range(len(record[2]) - 1, 3, -1):
+                inherited = rated.get(record[2][:size])
+                if inherited:
+                    record[4] = inherited
+                    break
+
+        conn = sqlite3.connect(path)
+        try:
+            conn.executescript(
+                """
+                PRAGMA journal_mode = OFF;
+                PRAGMA synchronous = OFF;
+                CREATE TABLE hts (
+                    seq INTEGER PRIMARY KEY,
+                    htsno TEXT NOT NULL,
+                    digits TEXT NOT NULL,
+                    description TEXT,
+                    general TEXT,
+                    special TEXT,
+                    other TEXT,
+                    units TEXT
+                );
+                CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+                """
+            )
+            conn.executemany("INSERT INTO hts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", records)
+            conn.executescript(
+                """
+                CREATE INDEX idx_hts_htsno ON hts (htsno);
+                CREATE INDEX idx_hts_digits ON hts (digits, seq);
+                """
+            )
+            conn.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [
+                    ("release", release),
+                    ("loaded_at", str(time.time())),
+                    ("row_count", str(len(records))),
+                ],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return len(records)
+
+    def _row_to_dict(self, row: sqlite3.Row) -> dict:
+        return {
+            "htsno": row["htsno"],
+            "description": row["description"],
+            "general": row["general"],
+            "special": row["special"],
+            "other": row["other"],
+            "units": row["units"],
+        }
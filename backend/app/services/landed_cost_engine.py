@@ -0,0 +1,83 @@
+import numpy as np
+
+from .lane_matrix import LaneMatrix
+
+
+class LandedCostEngine:
+    """Vectorized landed-cost evaluation over origin x mode x quantity grids.
+
+    Mirrors the scalar arithmetic in LandedCostService (_estimate_freight and
+    _build_result) so a sweep cell equals the matching single calculation.
+    Distances and lane factors come from the shared LaneMatrix.
+    """
+
+    MPF_RATE = 0.003464
+    MPF_MIN = 31.67
+    MPF_MAX = 614.35
+    HMF_RATE = 0.00125
+    INSURANCE_RATE = 0.005
+
+    def __init__(self, lane_matrix: LaneMatrix, mode_pricing: dict[str, dict]) -> None:
+        self.lane_matrix = lane_matrix
+        self.modes = list(mode_pricing)
+        self.base_per_kg_km = np.array([mode_pricing[m]["base_per_kg_km"] for m in self.modes])
+        self.handling_fee = np.array([mode_pricing[m]["handling_fee"] for m in self.modes])
+        self.min_charge = np.array([mode_pricing[m]["min_charge"] for m in self.modes])
+        self.fuel_surcharge = np.array([mode_pricing[m]["fuel_surcharge"] for m in self.modes])
+
+    def sweep(
+        self,
+        destination: str,
+        origins: list[str],
+        modes: list[str],
+        quantities: list[int],
+        unit_value_usd: float,
+        base_rate: float,
+        section_301_rates: list[float],
+    ) -> dict[str, np.ndarray]:
+        """Evaluate every (origin, mode, quantity) cell; arrays are shaped O x M x Q."""
+        table = self.lane_matrix.table
+        o_idx = np.array([table.index[code] for code in origins], dtype=np.int64)
+        m_idx = np.array([self.modes.index(mode) for mode in modes], dtype=np.int64)
+        d_idx = table.index[destination]
+
+        quantity = np.asarray(quantities, dtype=np.float64)[None, None, :]
+        product_value = unit_value_usd * quantity
+        distance = table.distance_km[o_idx, d_idx][:, None, None]
+        lane_factor = table.lane_factors[o_idx, d_idx][:, None, None]
+        s301_rate = np.asarray(section_301_rates, dtype=np.float64)[:, None, None]
+
+        base_per_kg_km = self.base_per_kg_km[m_idx][None, :, None]
+        handling_fee = self.handling_fee[m_idx][None, :, None]
+        min_charge = self.min_charge[m_idx][None, :, None]
+        fuel_surcharge = self.fuel_surcharge[m_idx][None, :, None]
+        is_ocean = (np.array(modes) == "ocean")[None, :, None]
+
+        weight = np.maximum(120.0, quantity * 1.6)
+        subtotal = weight * distance * base_per_kg_km * lane_factor + handling_fee
+        freight = np.round(np.maximum(min_charge, subtotal * (1 + fuel_surcharge)), 2)
+
+        base_duty = product_value * base_rate
+        section_301 = product_value * s301_rate
+        mpf = np.clip(product_value * self.MPF_RATE, self.MPF_MIN, self.MPF_MAX)
+        hmf = np.where(is_ocean, product_value * self.HMF_RATE, 0.0)
+        insurance = (product_value + freight) * self.INSURANCE_RATE
+
+        shape = (len(origins), len(modes), len(quantities))
+        total_duties = np.broadcast_to(base_duty + section_301 + mpf + hmf, shape)
+        total_freight = np.broadcast_to(freight + insurance, shape)
+        total = np.broadcast_to(product_value, shape) + total_duties + total_freight
+
+        return {
+            "product_value": np.broadcast_to(product_value, shape),
+            "distance_km": np.broadcast_to(distance, shape),
+            "base_duty": np.broadcast_to(base_duty, shape),
+            "section_301": np.broadcast_to(section_301, shape),
+            "mpf": np.broadcast_to(mpf, shape),
+            "hmf": np.broadcast_to(hmf, shape),
+            "freight": np.broadcast_to(freight, shape),
+            "insurance": np.broadcast_to(insurance, shape),
+            "total_duties": total_duties,
+            "total_landed_cost": total,
+            "cost_per_unit": total / np.broadcast_to(quantity, shape),
+        }
@@ -1,7 +1,19 @@
-import math
-
-from pydantic import BaseModel, Field
-
+import asyncio
+import csv
+import io
+import json
+import re
+import time
+from functools import cached_property
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import numpy as np
+
+from fastapi import HTTPException, UploadFile
+from pydantic import BaseModel, Field, ValidationError
+
+from .landed_cost_engine import LandedCostEngine
+from .lane_matrix import LaneMatrix
 from .live_data_service import live_data_service
 
 
@@ -22,6 +34,21 @@ class LandedCostResult(BaseModel):
     breakdown: dict
     effective_duty_rate: float
     warnings: list[str]
+    timings_ms: dict[str, float] = {}
+
+
+class ScenarioSweepRequest(BaseModel):
+    hs_code: str
+    unit_value: float = Field(gt=0)
+    destination_country: str
+    origin_countries: Optional[list[str]] = Field(default=None, max_length=300)
+    shipping_modes: list[str] = ["ocean", "air", "rail"]
+    quantities: list[int] = Field(
+        default=[100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000],
+        max_length=100,
+    )
+    currency: str = "USD"
+    top_n: int = Field(default=50, gt=0, le=5000)
 
 
 class LandedCostService:
@@ -76,6 +103,47 @@ class LandedCostService:
         "ZA": "AF",
     }
 
+    # Per-upstream budgets (seconds) for the concurrent lookup stage.
+    STAGE_TIMEOUTS = {
+        "fx": 5.0,
+        "hts": 10.0,
+        "section_301": 10.0,
+        "origin_hub": 6.0,
+        "destination_hub": 6.0,
+    }
+    STAGE_LABELS = {
+        "fx": "Exchange rate",
+        "hts": "HTS tariff",
+        "section_301": "Section 301",
+        "origin_hub": "Origin country geo",
+        "destination_hub": "Destination country geo",
+    }
+
+    MAX_BATCH_ROWS = 20000
+    MAX_BATCH_UPLOAD_BYTES = 20 * 1024 * 1024
+    BATCH_LOOKUP_CONCURRENCY = 16
+    BATCH_CHUNK_SIZE = 250
+    BATCH_CSV_COLUMNS = [
+        "row",
+        "hs_code",
+        "origin_country",
+        "destination_country",
+        "shipping_mode",
+        "quantity",
+        "product_value_usd",
+        "base_duty",
+        "section_301",
+        "mpf",
+        "hmf",
+        "freight",
+        "insurance",
+        "total_landed_cost",
+        "cost_per_unit",
+        "effective_duty_rate",
+        "warnings",
+        "error",
+    ]
+
     MODE_PRICING = {
         "ocean": {
             "base_per_kg_km": 0.00005,
@@ -97,6 +165,18 @@ class LandedCostService:
         },
     }
 
+    @cached_property
+    def lane_matrix(self) -> LaneMatrix:
+        return LaneMatrix(
+            hubs=self.COUNTRY_HUBS,
+            regions=self.COUNTRY_REGION,
+            lane_factor=self._lane_factor,
+        )
+
+    @cached_property
+    def scenario_engine(self) -> LandedCostEngine:
+        return LandedCostEngine(lane_matrix=self.lane_matrix, mode_pricing=self.MODE_PRICING)
+
     def _parse_rate(self, rate_value: str | float | int) -> float:
         if isinstance(rate_value, (int, float)):
             numeric = float(rate_value)
@@ -125,23 +205,6 @@ class LandedCostService:
         except ValueError:
             return 0.0
 
-    def _haversine_km(self, origin: tuple[float, float], destination: tuple[float, float]) -> float:
-        lat1, lon1 = origin
-        lat2, lon2 = destination
-        radius_km = 6371.0
-
-        phi1 = math.radians(lat1)
-        phi2 = math.radians(lat2)
-        d_phi = math.radians(lat2 - lat1)
-        d_lambda = math.radians(lon2 - lon1)
-
-        a = (
-            math.sin(d_phi / 2) ** 2
-            + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
-        )
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        return radius_km * c
-
     def _lane_factor(self, origin_country: str, destination_country: str) -> float:
         if origin_country == destination_country:
             return 0.35
@@ -157,16 +220,18 @@ class LandedCostService:
 
         return 1.0
 
+    def _country_code(self, value) -> str:
+        return str(value or "").strip().upper()
+
     async def _resolve_country_hub(
         self,
         country_code: str,
         warnings: list[str],
     ) -> tuple[tuple[float, float] | None, str | None]:
-        code = (country_code or "").strip().upper()
-        hub = self.COUNTRY_HUBS.get(code)
-        region = self.COUNTRY_REGION.get(code)
-        if hub:
-            return hub, region
+        code = self._country_code(country_code)
+        known = self.lane_matrix.hub(code)
+        if known:
+            return known
 
         geo = await live_data_service.get_country_geo(code)
         if geo:
@@ -180,17 +245,20 @@ class LandedCostService:
                 "OCEANIA": "APAC",
             }
             mapped_region = region_map.get(str(derived_region or "").upper(), "OTHER")
+            self.lane_matrix.add_country(code, geo["lat"], geo["lon"], mapped_region)
             return (geo["lat"], geo["lon"]), mapped_region
 
         warnings.append(f"Country geo unavailable for {code}, using default lane estimate")
         return None, None
 
-    async def _estimate_freight(
+    def _estimate_freight(
         self,
         shipping_mode: str,
         quantity: int,
         origin_country: str,
         destination_country: str,
+        origin: tuple[tuple[float, float] | None, str | None],
+        destination: tuple[tuple[float, float] | None, str | None],
         warnings: list[str],
     ) -> tuple[float, dict]:
         mode = (shipping_mode or "ocean").lower()
@@ -199,22 +267,25 @@ class LandedCostService:
             mode = "ocean"
 
         pricing = self.MODE_PRICING[mode]
-        origin_code = (origin_country or "").upper()
-        destination_code = (destination_country or "").upper()
-
-        origin_hub, origin_region = await self._resolve_country_hub(origin_code, warnings)
-        destination_hub, destination_region = await self._resolve_country_hub(destination_code, warnings)
-        if not origin_hub or not destination_hub:
+        origin_code = self._country_code(origin_country)
+        destination_code = self._country_code(destination_country)
+
+        origin_hub, origin_region = origin
+        destination_hub, destination_region = destination
+        lane = None
+        if origin_hub and destination_hub:
+            lane = self.lane_matrix.lookup(origin_code, destination_code)
+        if lane:
+            distance_km, lane_factor = lane
+        else:
             distance_km = 8000.0
             warnings.append("Using default lane distance estimate for freight")
-        else:
-            distance_km = self._haversine_km(origin_hub, destination_hub)
+            lane_factor = self._lane_factor(origin_code, destination_code)
+            if origin_region and destination_region and origin_region != destination_region:
+                lane_factor *= 1.06
 
         # Weight estimate from quantity (used when gross weight is unavailable).
         estimated_weight_kg = max(120.0, quantity * 1.6)
-        lane_factor = self._lane_factor(origin_code, destination_code)
-        if origin_region and destination_region and origin_region != destination_region:
-            lane_factor *= 1.06
 
         variable_cost = (
             estimated_weight_kg * distance_km * pricing["base_per_kg_km"] * lane_factor
@@ -233,15 +304,108 @@ class LandedCostService:
             "destination_region": destination_region or "UNKNOWN",
         }
 
+    async def _run_stage(
+        self,
+        name: str,
+        coro: Awaitable,
+        fallback: Callable[[], object],
+        timings: dict[str, float],
+        warnings: list[str],
+    ):
+        """Await one upstream lookup within its own budget, degrading to a fallback value."""
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(coro, timeout=self.STAGE_TIMEOUTS[name])
+        except asyncio.TimeoutError:
+            warnings.append(f"{self.STAGE_LABELS[name]} lookup timed out; using fallback")
+        except Exception as exc:
+            warnings.append(f"{self.STAGE_LABELS[name]} lookup failed ({exc.__class__.__name__}); using fallback")
+        finally:
+            timings[name] = round((time.perf_counter() - started) * 1000, 2)
+        return fallback()
+
+    async def _gather_inputs(
+        self,
+        request: LandedCostRequest,
+        warnings: list[str],
+        timings: dict[str, float],
+    ) -> dict:
+        """Fetch FX, HTS, Section 301 and both lane hubs concurrently."""
+        started = time.perf_counter()
+        fx_rates, hts_data, section_301_status, origin, destination = await asyncio.gather(
+            self._run_stage(
+                "fx",
+                live_data_service.get_exchange_rates(),
+                lambda: {"rates": dict(live_data_service.FX_FALLBACK_RATES), "live": False},
+                timings,
+                warnings,
+            ),
+            self._run_stage(
+                "hts",
+                live_data_service.get_hts_data(request.hs_code),
+                lambda: live_data_service.get_fallback_hts(request.hs_code),
+                timings,
+                warnings,
+            ),
+            self._run_stage(
+                "section_301",
+                live_data_service.get_section_301_status(request.hs_code, request.origin_country),
+                lambda: {"applies": False, "rate": 0.0, "source": "Unavailable"},
+                timings,
+                warnings,
+            ),
+            self._run_stage(
+                "origin_hub",
+                self._resolve_country_hub(request.origin_country, warnings),
+                lambda: (None, None),
+                timings,
+                warnings,
+            ),
+            self._run_stage(
+                "destination_hub",
+                self._resolve_country_hub(request.destination_country, warnings),
+                lambda: (None, None),
+                timings,
+                warnings,
+            ),
+        )
+        timings["upstream_wall"] = round((time.perf_counter() - started) * 1000, 2)
+        return {
+            "fx_rates": fx_rates,
+            "hts_data": hts_data,
+            "section_301_status": section_301_status,
+            "origin": origin,
+            "destination": destination,
+        }
+
     async def calculate(self, request: LandedCostRequest) -> LandedCostResult:
         """Calculate complete landed cost"""
+        started = time.perf_counter()
         warnings = []
+        timings: dict[str, float] = {}
+        inputs = await self._gather_inputs(request, warnings, timings)
+
+        compute_started = time.perf_counter()
+        result = self._build_result(request, inputs, warnings)
+        timings["compute"] = round((time.perf_counter() - compute_started) * 1000, 2)
+        timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+        result.timings_ms = timings
+        return result
+
+    def _build_result(
+        self,
+        request: LandedCostRequest,
+        inputs: dict,
+        warnings: list[str],
+    ) -> LandedCostResult:
         input_currency = (request.currency or "USD").upper().strip()
         input_product_value = request.product_value
 
-        fx_rates = await live_data_service.get_exchange_rates()
+        fx_rates = inputs["fx_rates"]
         if not fx_rates.get("live"):
             warnings.append("Using fallback exchange rates")
+        elif fx_rates.get("stale"):
+            warnings.append("Exchange rate snapshot is stale; upstream refresh is failing")
 
         exchange_rate_to_usd = 1.0
         product_value_usd = request.product_value
@@ -255,14 +419,12 @@ class LandedCostService:
                 warnings.append(f"Unsupported currency '{input_currency}', treated as USD")
                 input_currency = "USD"
 
-        hts_data = await live_data_service.get_hts_data(request.hs_code)
+        hts_data = inputs["hts_data"]
         base_rate = self._parse_rate(hts_data.get("general_rate", "0%"))
         if not hts_data.get("live"):
             warnings.append("Using fallback HTS tariff data")
 
-        section_301_status = await live_data_service.get_section_301_status(
-            request.hs_code, request.origin_country
-        )
+        section_301_status = inputs["section_301_status"]
         section_301_rate = section_301_status.get("rate", 0.0)
         if section_301_status.get("applies"):
             warnings.append(section_301_status.get("message", "Section 301 tariff applies"))
@@ -279,11 +441,13 @@ class LandedCostService:
         hmf = product_value_usd * hmf_rate if request.shipping_mode == "ocean" else 0.0
 
         # Estimate shipping costs
-        freight, freight_meta = await self._estimate_freight(
+        freight, freight_meta = self._estimate_freight(
             shipping_mode=request.shipping_mode,
             quantity=request.quantity,
             origin_country=request.origin_country,
             destination_country=request.destination_country,
+            origin=inputs["origin"],
+            destination=inputs["destination"],
             warnings=warnings,
         )
 
@@ -324,11 +488,400 @@ class LandedCostService:
                 "hts_description": hts_data.get("description", ""),
                 "hts_source": hts_data.get("source", "Unknown"),
                 "section_301_source": section_301_status.get("source", "Unknown"),
-                "exchange_rates": fx_rates.get("rates", {}),
+                # Only the rate this quote used; the full table lives in the FX snapshot.
+                "exchange_rates": {"USD": 1.0, input_currency: exchange_rate_to_usd},
+                "exchange_rates_timestamp": fx_rates.get("timestamp"),
             },
             effective_duty_rate=round((total_duties / max(product_value_usd, 1)) * 100, 2),
             warnings=warnings,
         )
 
+    async def sweep_scenarios(self, request: ScenarioSweepRequest) -> dict:
+        """Rank every origin x mode x quantity scenario for one SKU with array arithmetic."""
+        started = time.perf_counter()
+        engine = self.scenario_engine
+        table = self.lane_matrix.table
+        warnings: list[str] = []
+
+        destination = self._country_code(request.destination_country)
+        if destination not in table.index:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Destination {destination or '?'} has no configured hub for scenario sweeps",
+            )
+
+        requested_origins = request.origin_countries or [code for code in table.codes if code != destination]
+        origins = []
+        for code in dict.fromkeys(self._country_code(item) for item in requested_origins):
+            if code in table.index:
+                origins.append(code)
+            else:
+                warnings.append(f"Origin {code} has no configured hub; skipped")
+
+        modes = []
+        for mode in dict.fromkeys(str(item).strip().lower() for item in request.shipping_modes):
+            if mode in engine.modes:
+                modes.append(mode)
+            else:
+                warnings.append(f"Unsupported shipping mode '{mode}'; skipped")
+
+        quantities = sorted({int(item) for item in request.quantities if int(item) > 0})
+        if not origins or not modes or not quantities:
+            raise HTTPException(status_code=400, detail="Scenario grid is empty after validation")
+
+        timings: dict[str, float] = {}
+        section_301_warnings: list[str] = []
+        fx_rates, hts_data, section_301_statuses = await asyncio.gather(
+            self._run_stage(
+                "fx",
+                live_data_service.get_exchange_rates(),
+                lambda: {"rates": dict(live_data_service.FX_FALLBACK_RATES), "live": False},
+                timings,
+                warnings,
+            ),
+            self._run_stage(
+                "hts",
+                live_data_service.get_hts_data(request.hs_code),
+                lambda: live_data_service.get_fallback_hts(request.hs_code),
+                timings,
+                warnings,
+            ),
+            asyncio.gather(
+                *[
+                    self._run_stage(
+                        "section_301",
+                        live_data_service.get_section_301_status(request.hs_code, origin),
+                        lambda: {"applies": False, "rate": 0.0, "source": "Unavailable"},
+                        timings,
+                        section_301_warnings,
+                    )
+                    for origin in origins
+                ]
+            ),
+        )
+        # One warning per failure kind, not one per origin.
+        warnings.extend(dict.fromkeys(section_301_warnings))
+
+        currency = (request.currency or "USD").strip().upper()
+        unit_value_usd = request.unit_value
+        if currency != "USD":
+            rate = fx_rates.get("rates", {}).get(currency)
+            if isinstance(rate, (int, float)) and rate > 0:
+                unit_value_usd = request.unit_value / float(rate)
+            else:
+                warnings.append(f"Unsupported currency '{currency}', treated as USD")
+                currency = "USD"
+        if not fx_rates.get("live"):
+            warnings.append("Using fallback exchange rates")
+        if not hts_data.get("live"):
+            warnings.append("Using fallback HTS tariff data")
+
+        base_rate = self._parse_rate(hts_data.get("general_rate", "0%"))
+        section_301_rates = [float(status.get("rate", 0.0)) for status in section_301_statuses]
+
+        compute_started = time.perf_counter()
+        grid = engine.sweep(
+            destination=destination,
+            origins=origins,
+            modes=modes,
+            quantities=quantities,
+            unit_value_usd=unit_value_usd,
+            base_rate=base_rate,
+            section_301_rates=section_301_rates,
+        )
+        cost_per_unit = grid["cost_per_unit"].ravel()
+        top_n = min(request.top_n, cost_per_unit.size)
+        ranked = np.argsort(cost_per_unit, kind="stable")[:top_n]
+        o_pos, m_pos, q_pos = np.unravel_index(ranked, grid["cost_per_unit"].shape)
+
+        scenarios = []
+        for rank, (flat, o, m, q) in enumerate(zip(ranked, o_pos, m_pos, q_pos), start=1):
+            scenarios.append(
+                {
+                    "rank": rank,
+                    "origin_country": origins[o],
+                    "shipping_mode": modes[m],
+                    "quantity": quantities[q],
+                    **{
+                        key: round(float(grid[key].flat[flat]), 2)
+                        for key in (
+                            "product_value",
+                            "base_duty",
+                            "section_301",
+                            "mpf",
+                            "hmf",
+                            "freight",
+                            "insurance",
+                            "total_duties",
+                            "total_landed_cost",
+                            "cost_per_unit",
+                        )
+                    },
+                    "lane_distance_km": round(float(grid["distance_km"].flat[flat]), 1),
+                }
+            )
+        timings["compute"] = round((time.perf_counter() - compute_started) * 1000, 2)
+        timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+
+        return {
+            "hs_code": request.hs_code,
+            "destination_country": destination,
+            "unit_value_usd": round(unit_value_usd, 4),
+            "input_currency": currency,
+            "base_duty_rate": base_rate,
+            "hts_source": hts_data.get("source", "Unknown"),
+            "scenarios_evaluated": int(cost_per_unit.size),
+            "scenarios": scenarios,
+            "warnings": warnings,
+            "timings_ms": timings,
+        }
+
+    async def read_batch_upload(self, file: UploadFile) -> list[dict]:
+        """Read landed-cost rows from an uploaded CSV file."""
+        content = await file.read(self.MAX_BATCH_UPLOAD_BYTES + 1)
+        if not content:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty")
+        if len(content) > self.MAX_BATCH_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail="File exceeds 20MB limit")
+
+        reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig", errors="replace")))
+        rows = []
+        for record in reader:
+            rows.append(
+                {
+                    str(key).strip().lower(): value.strip()
+                    for key, value in record.items()
+                    if key and isinstance(value, str) and value.strip()
+                }
+            )
+        return rows
+
+    def parse_batch_rows(self, rows: list) -> list[LandedCostRequest | str]:
+        """Validate raw rows individually so one bad line does not reject the batch."""
+        if len(rows) > self.MAX_BATCH_ROWS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch exceeds {self.MAX_BATCH_ROWS} rows",
+            )
+
+        parsed: list[LandedCostRequest | str] = []
+        for row in rows:
+            if not isinstance(row, dict):
+                parsed.append("Row must be an object")
+                continue
+            try:
+                parsed.append(LandedCostRequest(**row))
+            except ValidationError as exc:
+                parsed.append(
+                    "; ".join(
+                        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                        for error in exc.errors()
+                    )
+                )
+        return parsed
+
+    async def calculate_batch_stream(
+        self,
+        items: list[LandedCostRequest | str],
+        output_format: str = "ndjson",
+    ) -> AsyncIterator[str]:
+        """Price a catalog with one lookup per distinct input, streaming rows as NDJSON or CSV."""
+        started = time.perf_counter()
+        requests = [item for item in items if isinstance(item, LandedCostRequest)]
+        shared = await self._prefetch_batch_inputs(requests)
+        prefetch_ms = round((time.perf_counter() - started) * 1000, 2)
+
+        as_csv = output_format == "csv"
+        if as_csv:
+            yield self._csv_line(self.BATCH_CSV_COLUMNS)
+
+        priced = 0
+        failed = 0
+        for offset in range(0, len(items), self.BATCH_CHUNK_SIZE):
+            lines = []
+            for row_number, item in enumerate(
+                items[offset:offset + self.BATCH_CHUNK_SIZE], start=offset + 1
+            ):
+                if isinstance(item, str):
+                    failed += 1
+                    lines.append(self._batch_error_line(row_number, item, as_csv))
+                    continue
+
+                warnings: list[str] = []
+                origin_code = self._country_code(item.origin_country)
+                destination_code = self._country_code(item.destination_country)
+                warnings.extend(shared["hub_warnings"].get(origin_code, []))
+                warnings.extend(shared["hub_warnings"].get(destination_code, []))
+                inputs = {
+                    "fx_rates": shared["fx_rates"],
+                    "hts_data": shared["hts"][item.hs_code],
+                    "section_301_status": shared["section_301"][self._section_301_key(item)],
+                    "origin": shared["hubs"][origin_code],
+                    "destination": shared["hubs"][destination_code],
+                }
+                result = self._build_result(item, inputs, warnings)
+                priced += 1
+                lines.append(self._batch_result_line(row_number, item, result, as_csv))
+
+            yield "".join(lines)
+            # Let other requests run between chunks of a large catalog.
+            await asyncio.sleep(0)
+
+        if not as_csv:
+            yield json.dumps(
+                {
+                    "type": "summary",
+                    "rows": len(items),
+                    "priced": priced,
+                    "failed": failed,
+                    "distinct_hs_codes": len(shared["hts"]),
+                    "distinct_section_301_keys": len(shared["section_301"]),
+                    "distinct_countries": len(shared["hubs"]),
+                    "prefetch_ms": prefetch_ms,
+                    "lookup_warnings": sorted(set(shared["warnings"])),
+                    "exchange_rates": {
+                        "base": shared["fx_rates"].get("base", "USD"),
+                        "rates": shared["fx_rates"].get("rates", {}),
+                        "timestamp": shared["fx_rates"].get("timestamp"),
+                        "live": bool(shared["fx_rates"].get("live")),
+                    },
+                    "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+                }
+            ) + "\n"
+
+    async def _prefetch_batch_inputs(self, requests: list[LandedCostRequest]) -> dict:
+        semaphore = asyncio.Semaphore(self.BATCH_LOOKUP_CONCURRENCY)
+        stage_warnings: list[str] = []
+
+        async def limited(name: str, coro: Awaitable, fallback: Callable[[], object]):
+            async with semaphore:
+                return await self._run_stage(name, coro, fallback, {}, stage_warnings)
+
+        hs_codes = list(dict.fromkeys(item.hs_code for item in requests))
+        section_301_keys = {}
+        for item in requests:
+            section_301_keys.setdefault(self._section_301_key(item), item)
+        countries = list(
+            dict.fromkeys(
+                code
+                for item in requests
+                for code in (self._country_code(item.origin_country), self._country_code(item.destination_country))
+            )
+        )
+        hub_warnings: dict[str, list[str]] = {code: [] for code in countries}
+
+        fx_rates = await self._run_stage(
+            "fx",
+            live_data_service.get_exchange_rates(),
+            lambda: {"rates": dict(live_data_service.FX_FALLBACK_RATES), "live": False},
+            {},
+            stage_warnings,
+        )
+        hts_results, section_301_results, hub_results = await asyncio.gather(
+            asyncio.gather(
+                *[
+                    limited(
+                        "hts",
+                        live_data_service.get_hts_data(code),
+                        lambda code=code: live_data_service.get_fallback_hts(code),
+                    )
+                    for code in hs_codes
+                ]
+            ),
+            asyncio.gather(
+                *[
+                    limited(
+                        "section_301",
+                        live_data_service.get_section_301_status(item.hs_code, item.origin_country),
+                        lambda: {"applies": False, "rate": 0.0, "source": "Unavailable"},
+                    )
+                    for item in section_301_keys.values()
+                ]
+            ),
+            asyncio.gather(
+                *[
+                    limited(
+                        "origin_hub",
+                        self._resolve_country_hub(code, hub_warnings[code]),
+                        lambda: (None, None),
+                    )
+                    for code in countries
+                ]
+            ),
+        )
+
+        return {
+            "fx_rates": fx_rates,
+            "hts": dict(zip(hs_codes, hts_results)),
+            "section_301": dict(zip(section_301_keys, section_301_results)),
+            "hubs": dict(zip(countries, hub_results)),
+            "hub_warnings": hub_warnings,
+            "warnings": stage_warnings,
+        }
+
+    def _section_301_key(self, request: LandedCostRequest) -> tuple[str, str]:
+        hs_prefix = re.sub(r"[^0-9]", "", request.hs_code)[:4]
+        return hs_prefix, self._country_code(request.origin_country)
+
+    def _batch_result_line(
+        self,
+        row_number: int,
+        request: LandedCostRequest,
+        result: LandedCostResult,
+        as_csv: bool,
+    ) -> str:
+        if not as_csv:
+            return json.dumps(
+                {
+                    "type": "result",
+                    "row": row_number,
+                    "request": request.model_dump(),
+                    # The FX snapshot is written once in the summary record instead.
+                    **result.model_dump(
+                        exclude={
+                            "timings_ms": True,
+                            "breakdown": {"exchange_rates": True, "exchange_rates_timestamp": True},
+                        }
+                    ),
+                }
+            ) + "\n"
+
+        breakdown = result.breakdown
+        return self._csv_line(
+            [
+                row_number,
+                request.hs_code,
+                request.origin_country,
+                request.destination_country,
+                breakdown["mode_used"],
+                request.quantity,
+                breakdown["product_value"],
+                breakdown["base_duty"],
+                breakdown["section_301"],
+                breakdown["mpf"],
+                breakdown["hmf"],
+                breakdown["freight"],
+                breakdown["insurance"],
+                result.total_landed_cost,
+                result.cost_per_unit,
+                result.effective_duty_rate,
+                "; ".join(result.warnings),
+                "",
+            ]
+        )
+
+    def _batch_error_line(self, row_number: int, error: str, as_csv: bool) -> str:
+        if not as_csv:
+            return json.dumps({"type": "error", "row": row_number, "error": error}) + "\n"
+        values = [""] * len(self.BATCH_CSV_COLUMNS)
+        values[0] = row_number
+        values[-1] = error
+        return self._csv_line(values)
+
+    def _csv_line(self, values: list) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(values)
+        return buffer.getvalue()
+
 
 landed_cost_service = LandedCostService()
@@ -0,0 +1,136 @@
+from typing import Callable, NamedTuple, Optional
+
+import numpy as np
+
+
+class LaneTable(NamedTuple):
+    codes: tuple[str, ...]
+    index: dict[str, int]
+    coords: np.ndarray
+    regions: tuple[Optional[str], ...]
+    distance_km: np.ndarray
+    lane_factors: np.ndarray
+
+
+class LaneMatrix:
+    """Dense country-hub distance and lane-factor table.
+
+    Built once from the static hub list, then grown one row/column at a time
+    as countries are resolved through the country geo table. Resolved hubs are
+    kept in memory only; the geo table is local, so a restart re-resolves them
+    without a network call.
+    """
+
+    EARTH_RADIUS_KM = 6371.0
+    CROSS_REGION_MULTIPLIER = 1.06
+
+    def __init__(
+        self,
+        hubs: dict[str, tuple[float, float]],
+        regions: dict[str, str],
+        lane_factor: Callable[[str, str], float],
+    ) -> None:
+        self._lane_factor = lane_factor
+
+        codes = list(hubs)
+        coords = [hubs[code] for code in codes]
+        hub_regions = [regions.get(code) for code in codes]
+        self._table = self._build(codes, coords, hub_regions)
+
+    @property
+    def table(self) -> LaneTable:
+        return self._table
+
+    def hub(self, code: str) -> Optional[tuple[tuple[float, float], Optional[str]]]:
+        table = self._table
+        idx = table.index.get(code)
+        if idx is None:
+            return None
+        return (float(table.coords[idx, 0]), float(table.coords[idx, 1])), table.regions[idx]
+
+    def lookup(self, origin: str, destination: str) -> Optional[tuple[float, float]]:
+        """Return (distance_km, lane_factor) for a lane, or None when either hub is unknown."""
+        table = self._table
+        o_idx = table.index.get(origin)
+        d_idx = table.index.get(destination)
+        if o_idx is None or d_idx is None:
+            return None
+        return float(table.distance_km[o_idx, d_idx]), float(table.lane_factors[o_idx, d_idx])
+
+    def add_country(self, code: str, lat: float, lon: float, region: Optional[str]) -> None:
+        """Append one resolved country; existing rows are reused as-is."""
+        table = self._table
+        if code in table.index:
+            return
+
+        codes = table.codes + (code,)
+        regions = table.regions + (region,)
+        coords = np.vstack([table.coords, [[lat, lon]]])
+        size = len(codes)
+
+        new_distances = self._haversine(coords[-1], coords)
+        distance_km = np.zeros((size, size), dtype=np.float64)
+        distance_km[:-1, :-1] = table.distance_km
+        distance_km[-1, :] = new_distances
+        distance_km[:, -1] = new_distances
+
+        lane_factors = np.ones((size, size), dtype=np.float64)
+        lane_factors[:-1, :-1] = table.lane_factors
+        for idx, other in enumerate(codes):
+            lane_factors[-1, idx] = self._factor(code, other, region, regions[idx])
+            lane_factors[idx, -1] = self._factor(other, code, regions[idx], region)
+
+        # Swap the whole table in one assignment so readers never see a half-grown matrix.
+        self._table = LaneTable(
+            codes=codes,
+            index={**table.index, code: size - 1},
+            coords=coords,
+            regions=regions,
+            distance_km=distance_km,
+            lane_factors=lane_factors,
+        )
+
+    def _build(
+        self,
+        codes: list[str],
+        coords: list[tuple[float, float]],
+        regions: list[Optional[str]],
+    ) -> LaneTable:
+        coords_array = np.array(coords, dtype=np.float64).reshape(-1, 2)
+        size = len(codes)
+        distance_km = np.zeros((size, size), dtype=np.float64)
+        lane_factors = np.ones((size, size), dtype=np.float64)
+        for i, origin in enumerate(codes):
+            distance_km[i] = self._haversine(coords_array[i], coords_array)
+            for j, destination in enumerate(codes):
+                lane_factors[i, j] = self._factor(origin, destination, regions[i], regions[j])
+        return LaneTable(
+            codes=tuple(codes),
+            index={code: idx for idx, code in enumerate(codes)},
+            coords=coords_array,
+            regions=tuple(regions),
+            distance_km=distance_km,
+            lane_factors=lane_factors,
+        )
+
+    def _factor(
+        self,
+        origin: str,
+        destination: str,
+        origin_region: Optional[str],
+        destination_region: Optional[str],
+    ) -> float:
+        factor = self._lane_factor(origin, destination)
+        if origin_region and destination_region and origin_region != destination_region:
+            factor *= self.CROSS_REGION_MULTIPLIER
+        return factor
+
+    def _haversine(self, point: np.ndarray, others: np.ndarray) -> np.ndarray:
+        lat1, lon1 = np.radians(point)
+        lat2 = np.radians(others[:, 0])
+        lon2 = np.radians(others[:, 1])
+        a = (
+            np.sin((lat2 - lat1) / 2) ** 2
+            + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        )
+        return self.EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
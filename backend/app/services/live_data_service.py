@@ -1,14 +1,21 @@
+import asyncio
 import logging
 import re
 import csv
+import hashlib
 import io
-import json
 import os
 import time
 import unicodedata
-from difflib import SequenceMatcher
 
-import httpx
+from ..core.cache import shared_cache
+from ..core.config import env_float
+from ..core.http_client import upstream_http
+from ..core.singleflight import SingleFlight
+from .compliance_rules import CompiledComplianceRules
+from .country_geo import CountryGeoTable
+from .hts_index import HtsIndex
+from .ofac_screening import OfacScreeningIndex
 
 logger = logging.getLogger(__name__)
 
@@ -17,11 +24,13 @@ class LiveDataService:
     """Real-time data from government and public APIs with safe fallbacks."""
 
     USITC_BASE_URL = "https://hts.usitc.gov/reststop"
+    USITC_EXPORT_URL = "https://hts.usitc.gov/reststop/exportList"
     EXCHANGE_API_URL = "https://api.exchangerate-api.com/v4/latest/USD"
     OFAC_SDN_URL = "https://sanctionslistservice.ofac.treas.gov/api/publicationpreview/exports/sdn.csv"
-    COUNTRY_GEO_URL = "https://restcountries.com/v3.1/alpha/{code}"
+    COUNTRY_GEO_URL = "https://restcountries.com/v3.1/all"
     OFAC_CACHE_TTL_SECONDS = 24 * 60 * 60
     SECTION_301_CACHE_TTL_SECONDS = 24 * 60 * 60
+    FX_FALLBACK_RATES = {"CNY": 7.24, "EUR": 0.92, "GBP": 0.79, "INR": 83.12, "JPY": 149.50}
     COUNTRY_CODE_ALIASES = {
         "UK": "GB",
         "UAE": "AE",
@@ -36,63 +45,173 @@ class LiveDataService:
     }
 
     def __init__(self) -> None:
-        self._country_geo_cache: dict[str, dict] = {}
-        self._ofac_entries_cache: list[dict] = []
+        self._country_geo = CountryGeoTable(
+            os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "country_geo.json")),
+            self.data_file("COUNTRY_GEO_OVERLAY_FILE", "country_geo_overlay.json"),
+        )
         self._ofac_cache_fetched_at: float = 0.0
-        rules = self._load_compliance_rules()
-        self._base_required_documents = rules.get("base_required_documents", [])
-        self._special_requirements = rules.get("special_requirements", {})
-        self._section_301_rates_cache = rules.get("section_301_rates_by_hs4", {})
-        self._country_route_rules = rules.get("country_route_rules", {})
+        self._ofac_index = OfacScreeningIndex([])
+        self._ofac_meta: dict = {}
+        self._ofac_snapshot_path = self.data_file("OFAC_SNAPSHOT_FILE", "ofac_sdn_snapshot.npz")
+        self._ofac_refresh_lock = asyncio.Lock()
+        self._rules_path = os.getenv(
+            "COMPLIANCE_RULES_FILE",
+            os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "compliance_rules.json")),
+        )
+        self._rules_signature = self._compliance_rules_signature()
+        self._rules = (
+            CompiledComplianceRules.from_file(self._rules_path, self._normalize_country_code)
+            or CompiledComplianceRules({}, self._normalize_country_code, path=self._rules_path)
+        )
+        self._section_301_rates_cache = dict(self._rules.section_301_rates)
         self._section_301_cache_fetched_at: float = 0.0
+        self._fx_snapshot: dict | None = None
+        self._fx_refresh_lock = asyncio.Lock()
+        self._fx_refresh_task: asyncio.Task | None = None
+        self._hts_index = HtsIndex(self.data_file("HTS_INDEX_FILE", "hts_index.sqlite"))
+        self._background_tasks: set[asyncio.Task] = set()
+        # Concurrent cache misses for the same key share one upstream fetch.
+        self._flights = SingleFlight()
+        # Keys whose last upstream attempt failed, mapped to when a retry is allowed.
+        self._negative_cache: dict[tuple, float] = {}
+        self._negative_cache_seconds = env_float("NEGATIVE_CACHE_SECONDS", 60.0, minimum=0.0)
+        self._fx_refresh_seconds = env_float("FX_REFRESH_INTERVAL_SECONDS", 900.0, minimum=30.0)
+        self._load_ofac_snapshot()
+
+        # Another worker refreshed a shared source: adopt its copy instead of refetching.
+        shared_cache.on_invalidate("ofac", self._on_shared_ofac_update)
+        shared_cache.on_invalidate("fx", self._on_shared_fx_update)
+        shared_cache.on_invalidate("section_301", self._on_shared_section_301_update)
+        shared_cache.on_invalidate("country_geo", self._on_shared_country_geo_update)
+
+    def scheduled_jobs(self) -> list[dict]:
+        """Cache prewarm/refresh jobs for the lifespan scheduler (see app.core.scheduler)."""
+        rules_poll = env_float("COMPLIANCE_RULES_POLL_SECONDS", 5.0, minimum=1.0)
+        hts_refresh = env_float("HTS_REFRESH_SECONDS", 0.0)
+
+        jobs = [
+            {"name": "ofac_sdn", "func": self.warm_ofac_index, "interval": 3600.0},
+            {"name": "fx_rates", "func": self.warm_exchange_rates, "interval": self._fx_refresh_interval()},
+            {"name": "section_301", "func": self.warm_section_301_rates, "interval": 3600.0},
+            {"name": "country_geo", "func": self.warm_country_geo, "interval": 3600.0, "warmup": False},
+            {
+                "name": "compliance_rules",
+                "func": self.warm_compliance_rules,
+                "interval": rules_poll,
+                "jitter": 0.0,
+                "warmup": False,
+            },
+        ]
+        # Full-release downloads are opt-in; otherwise scripts/load_hts_release.py loads them.
+        if hts_refresh > 0:
+            jobs.append(
+                {
+                    "name": "hts_release",
+                    "func": self.refresh_hts_release,
+                    "interval": max(3600.0, hts_refresh),
+                    "timeout": 600.0,
+                    "warmup": False,
+                }
+            )
+        return jobs
 
     async def get_hts_data(self, hs_code: str) -> dict:
-        """Get live tariff data from USITC HTS API."""
-        clean_code = re.sub(r"[^0-9]", "", hs_code)
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.USITC_BASE_URL}/search",
-                    params={"keyword": clean_code, "release": "currentRelease"},
-                    timeout=10.0,
+        """Get tariff data from the local HTS release index, or USITC search when none is loaded."""
+        if self._hts_index.is_loaded:
+            result = self._hts_index.lookup(hs_code)
+            if result:
+                return self._hts_payload(
+                    result,
+                    hs_code,
+                    source=f"USITC Official ({self._hts_index.release})",
                 )
-                response.raise_for_status()
-                data = response.json()
+            return self.get_fallback_hts(hs_code)
+
+        if os.getenv("HTS_LIVE_SEARCH", "true").strip().lower() not in {"1", "true", "yes", "on"}:
+            return self.get_fallback_hts(hs_code)
+
+        cache_key = hs_code.strip()
+        cached = await shared_cache.get("hts", cache_key)
+        if cached:
+            # The local tier hands out its own object; never let callers mutate it.
+            return dict(cached)
+
+        if self._recently_failed(("hts", cache_key)):
+            return self.get_fallback_hts(hs_code)
 
-                # Current USITC response is a list of rows from reststop/search.
-                if isinstance(data, list) and data:
-                    dotted_input = hs_code if "." in hs_code else self._format_hs(clean_code)
-                    result = self._pick_best_result(data, dotted_input, clean_code)
-                    return {
-                        "hs_code": result.get("htsno", hs_code),
-                        "description": result.get("description", ""),
-                        "general_rate": result.get("general", "0%"),
-                        "special_rate": result.get("special", ""),
-                        "column_2_rate": result.get("other", ""),
-                        "unit": result.get("units", ""),
-                        "source": "USITC Official",
-                        "live": True,
-                    }
+        payload = await self._flights.do(("hts", cache_key), lambda: self._search_hts_live(hs_code, cache_key))
+        return dict(payload) if payload is not None else self.get_fallback_hts(hs_code)
 
+    async def _search_hts_live(self, hs_code: str, cache_key: str) -> dict | None:
+        clean_code = re.sub(r"[^0-9]", "", hs_code)
+        try:
+            response = await upstream_http.get(
+                f"{self.USITC_BASE_URL}/search",
+                params={"keyword": clean_code, "release": "currentRelease"},
+                timeout=10.0,
+            )
+            response.raise_for_status()
+            data = response.json()
+
+            # Current USITC response is a list of rows from reststop/search.
+            payload = None
+            if isinstance(data, list) and data:
+                dotted_input = hs_code if "." in hs_code else self._format_hs(clean_code)
+                result = self._pick_best_result(data, dotted_input, clean_code)
+                payload = self._hts_payload(result, hs_code, source="USITC Official")
+            else:
                 # Backward compatibility in case response shape changes again.
                 results = data.get("results") if isinstance(data, dict) else None
                 if isinstance(results, list) and results:
-                    result = results[0]
-                    return {
-                        "hs_code": result.get("htsno", hs_code),
-                        "description": result.get("description", ""),
-                        "general_rate": result.get("general", "0%"),
-                        "special_rate": result.get("special", ""),
-                        "column_2_rate": result.get("other", ""),
-                        "unit": result.get("units", ""),
-                        "source": "USITC Official",
-                        "live": True,
-                    }
-            except Exception as exc:
-                logger.warning("USITC API failed for %s: %s", hs_code, exc)
+                    payload = self._hts_payload(results[0], hs_code, source="USITC Official")
+            if payload is not None:
+                await shared_cache.set("hts", cache_key, payload)
+            else:
+                self._remember_failure(("hts", cache_key))
+            return payload
+        except Exception as exc:
+            logger.warning("USITC API failed for %s: %s", hs_code, exc)
+            self._remember_failure(("hts", cache_key))
+            return None
 
-        return self._get_fallback_hts(hs_code)
+    async def refresh_hts_release(self, release: str | None = None) -> dict:
+        """Download the full USITC export and atomically swap it into the local index."""
+        response = await upstream_http.get(
+            self.USITC_EXPORT_URL,
+            params={"from": "0100", "to": "9999", "format": "JSON", "styles": "false"},
+            timeout=120.0,
+            follow_redirects=True,
+        )
+        response.raise_for_status()
+
+        label = release or f"usitc-{time.strftime('%Y%m%d')}"
+        rows = await asyncio.to_thread(self._hts_index.parse_export, response.content, "json")
+        await asyncio.to_thread(self._hts_index.load_release, rows, label)
+        # Back on the loop, so no lookup can still be running on the replaced connection.
+        self._hts_index.close_retired()
+        return self._hts_index.stats()
+
+    def load_hts_release(self, payload: str | bytes, release: str, fmt: str = "") -> dict:
+        """Index a USITC JSON/CSV export that was obtained out of band."""
+        rows = self._hts_index.parse_export(payload, fmt)
+        self._hts_index.load_release(rows, release)
+        self._hts_index.close_retired()
+        return self._hts_index.stats()
+
+    def get_hts_index_stats(self) -> dict:
+        return self._hts_index.stats()
+
+    def _hts_payload(self, result: dict, hs_code: str, source: str) -> dict:
+        return {
+            "hs_code": result.get("htsno", hs_code),
+            "description": result.get("description", ""),
+            "general_rate": result.get("general", "0%"),
+            "special_rate": result.get("special", ""),
+            "column_2_rate": result.get("other", ""),
+            "unit": result.get("units", ""),
+            "source": source,
+            "live": True,
+        }
 
     def _pick_best_result(self, rows: list[dict], dotted_input: str, clean_code: str) -> dict:
         # Prefer exact HTS number first, then best prefix match, then first row.
@@ -108,15 +227,9 @@ class LiveDataService:
         return rows[0]
 
     def _format_hs(self, clean_code: str) -> str:
-        if len(clean_code) >= 10:
-            return f"{clean_code[:4]}.{clean_code[4:6]}.{clean_code[6:8]}.{clean_code[8:10]}"
-        if len(clean_code) == 8:
-            return f"{clean_code[:4]}.{clean_code[4:6]}.{clean_code[6:8]}"
-        if len(clean_code) == 6:
-            return f"{clean_code[:4]}.{clean_code[4:6]}"
-        return clean_code
-
-    def _get_fallback_hts(self, hs_code: str) -> dict:
+        return self._hts_index.format_hs(clean_code)
+
+    def get_fallback_hts(self, hs_code: str) -> dict:
         fallback_rates = {
             "8504.40": {"rate": "0%", "desc": "Static converters"},
             "8518.30": {"rate": "0%", "desc": "Headphones and earphones"},
@@ -143,56 +256,47 @@ class LiveDataService:
             "live": False,
         }
 
-    def _load_compliance_rules(self) -> dict:
-        default_path = os.path.abspath(
-            os.path.join(os.path.dirname(__file__), "..", "data", "compliance_rules.json")
+    def data_file(self, env_name: str, filename: str) -> str:
+        default_dir = os.path.abspath(
+            os.path.join(os.path.dirname(__file__), "..", "data", "cache")
         )
-        rules_path = os.getenv("COMPLIANCE_RULES_FILE", default_path)
-
+        cache_dir = os.getenv("LIVE_DATA_CACHE_DIR", default_dir)
+        return os.getenv(env_name, os.path.join(cache_dir, filename))
+
+    def reload_compliance_rules(self, force: bool = False) -> bool:
+        """Recompile compliance_rules.json when it changed on disk and swap it in atomically."""
+        signature = self._compliance_rules_signature()
+        if not force and signature == self._rules_signature:
+            return False
+
+        rules = CompiledComplianceRules.from_file(self._rules_path, self._normalize_country_code)
+        self._rules_signature = signature
+        if rules is None:
+            # Keep serving the last good rules until the file is fixed.
+            return False
+
+        self._rules = rules
+        if not os.getenv("SECTION_301_RULES_URL", "").strip():
+            self._section_301_rates_cache = dict(rules.section_301_rates)
+        logger.info("Compliance rules reloaded (version %s)", rules.version)
+        return True
+
+    async def warm_compliance_rules(self) -> str:
+        reloaded = await asyncio.to_thread(self.reload_compliance_rules)
+        return f"reloaded {self._rules.version}" if reloaded else "unchanged"
+
+    def get_compliance_rules_info(self) -> dict:
+        return self._rules.stats()
+
+    def _compliance_rules_signature(self) -> tuple | None:
         try:
-            with open(rules_path, "r", encoding="utf-8") as file:
-                payload = json.load(file)
-        except Exception as exc:
-            logger.warning("Compliance rules file unavailable (%s): %s", rules_path, exc)
-            return {
-                "base_required_documents": [],
-                "special_requirements": {},
-                "section_301_rates_by_hs4": {},
-                "country_route_rules": {},
-            }
-
-        base_required = payload.get("base_required_documents", [])
-        special_requirements = payload.get("special_requirements", {})
-        section_301 = payload.get("section_301_rates_by_hs4", {})
-        country_route_rules = payload.get("country_route_rules", {})
-        if (
-            not isinstance(base_required, list)
-            or not isinstance(special_requirements, dict)
-            or not isinstance(section_301, dict)
-            or not isinstance(country_route_rules, dict)
-        ):
-            logger.warning("Compliance rules file has invalid shape: %s", rules_path)
-            return {
-                "base_required_documents": [],
-                "special_requirements": {},
-                "section_301_rates_by_hs4": {},
-                "country_route_rules": {},
-            }
-        return payload
+            stat = os.stat(self._rules_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
 
     def get_base_required_documents(self) -> list[dict]:
-        documents = []
-        for item in self._base_required_documents:
-            if not isinstance(item, dict):
-                continue
-            name = str(item.get("name", "")).strip()
-            status = str(item.get("status", "")).strip().lower()
-            if not name:
-                continue
-            if status not in {"required", "recommended"}:
-                status = "required"
-            documents.append({"name": name, "status": status})
-
+        documents = [dict(item) for item in self._rules.base_required_documents]
         if documents:
             return documents
 
@@ -205,45 +309,162 @@ class LiveDataService:
 
     def get_special_requirements(self, hs_code: str) -> list[str]:
         hs_prefix = re.sub(r"[^0-9]", "", hs_code)[:4]
-        requirements = self._special_requirements.get(hs_prefix, [])
-        if not isinstance(requirements, list):
-            return []
-        return [str(item).strip() for item in requirements if str(item).strip()]
+        return list(self._rules.special_requirements.get(hs_prefix, []))
 
     async def get_exchange_rates(self) -> dict:
-        """Get live exchange rates from exchangerate-api with fallback values."""
-        async with httpx.AsyncClient() as client:
+        """Serve the last good FX snapshot immediately and revalidate it in the background."""
+        snapshot = self._fx_snapshot
+        if snapshot is None:
+            if not self._recently_failed(("fx",)):
+                await self._flights.do(
+                    "fx",
+                    lambda: self.refresh_exchange_rates(max_age=self._fx_refresh_interval()),
+                )
+            snapshot = self._fx_snapshot
+        elif (time.time() - snapshot["fetched_at"]) >= self._fx_refresh_interval():
+            self._schedule_fx_refresh()
+
+        if snapshot is None:
+            return {
+                "base": "USD",
+                "rates": dict(self.FX_FALLBACK_RATES),
+                "source": "Fallback",
+                "live": False,
+            }
+
+        age = max(0.0, time.time() - snapshot["fetched_at"])
+        return {
+            "base": snapshot["base"],
+            # Copy so a caller cannot mutate the snapshot every later quote reads.
+            "rates": dict(snapshot["rates"]),
+            "timestamp": snapshot["timestamp"],
+            "snapshot_fetched_at": snapshot["fetched_at"],
+            "snapshot_age_seconds": round(age, 1),
+            "stale": age >= self._fx_refresh_interval() * 3,
+            "source": "exchangerate-api",
+            "live": True,
+        }
+
+    async def refresh_exchange_rates(self, max_age: float = 0.0) -> bool:
+        """Fetch a new FX snapshot unless the current one is younger than max_age seconds."""
+        async with self._fx_refresh_lock:
+            snapshot = self._fx_snapshot
+            if snapshot is not None and (time.time() - snapshot["fetched_at"]) < max_age:
+                return True
+            if max_age > 0 and await self._adopt_shared_fx(max_age):
+                return True
+
             try:
-                response = await client.get(self.EXCHANGE_API_URL, timeout=5.0)
+                response = await upstream_http.get(self.EXCHANGE_API_URL, timeout=5.0)
                 response.raise_for_status()
                 data = response.json()
-                rates = data.get("rates", {})
-
-                return {
-                    "base": "USD",
-                    "rates": {
-                        "CNY": rates.get("CNY", 7.24),
-                        "EUR": rates.get("EUR", 0.92),
-                        "GBP": rates.get("GBP", 0.79),
-                        "INR": rates.get("INR", 83.12),
-                        "JPY": rates.get("JPY", 149.50),
-                    },
-                    "timestamp": data.get("time_last_updated"),
-                    "source": "exchangerate-api",
-                    "live": True,
-                }
             except Exception as exc:
                 logger.warning("Exchange rate API failed: %s", exc)
+                self._remember_failure(("fx",))
+                return False
+
+            rates = {}
+            for currency, value in (data.get("rates") or {}).items():
+                if isinstance(value, (int, float)) and value > 0:
+                    rates[str(currency).upper()] = float(value)
+            if not rates:
+                logger.warning("Exchange rate API returned no usable rates")
+                self._remember_failure(("fx",))
+                return False
+
+            rates.setdefault("USD", 1.0)
+            self._fx_snapshot = {
+                "base": str(data.get("base", "USD")).upper(),
+                "rates": rates,
+                "timestamp": data.get("time_last_updated"),
+                "fetched_at": time.time(),
+            }
+            await shared_cache.set("fx", "latest", self._fx_snapshot)
+            return True
+
+    async def _adopt_shared_fx(self, max_age: float) -> bool:
+        shared = await shared_cache.get("fx", "latest")
+        if not isinstance(shared, dict) or not shared.get("rates"):
+            return False
+        fetched_at = float(shared.get("fetched_at") or 0)
+        if (time.time() - fetched_at) >= max_age:
+            return False
+        current = self._fx_snapshot
+        if current is None or fetched_at > current["fetched_at"]:
+            self._fx_snapshot = shared
+        return True
+
+    async def _on_shared_fx_update(self, key: str | None) -> None:
+        await self._adopt_shared_fx(self._fx_refresh_interval())
+
+    async def warm_exchange_rates(self) -> int:
+        refreshed = await self._flights.do(
+            "fx",
+            lambda: self.refresh_exchange_rates(max_age=self._fx_refresh_interval() / 2),
+        )
+        if not refreshed:
+            raise RuntimeError("FX refresh failed; serving last snapshot or fallback rates")
+        return len(self._fx_snapshot["rates"])
+
+    def _schedule_fx_refresh(self) -> None:
+        if self._fx_refresh_task is not None and not self._fx_refresh_task.done():
+            return
+        if self._recently_failed(("fx",)):
+            return
+        self._fx_refresh_task = asyncio.ensure_future(
+            self._flights.do("fx", lambda: self.refresh_exchange_rates(max_age=self._fx_refresh_interval()))
+        )
 
-        return {
-            "base": "USD",
-            "rates": {"CNY": 7.24, "EUR": 0.92, "GBP": 0.79, "INR": 83.12, "JPY": 149.50},
-            "source": "Fallback",
-            "live": False,
-        }
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def _fx_refresh_interval(self) -> float:
+        return self._fx_refresh_seconds
 
     async def screen_ofac(self, entity_name: str) -> dict:
         """Screen entity against OFAC SDN data with cached live list + fallback."""
+        if not self._normalize_entity_name(entity_name):
+            return self.screen_ofac_with_index(None, entity_name)
+
+        return self.screen_ofac_with_index(await self.get_ofac_index(), entity_name)
+
+    async def get_ofac_index(self) -> OfacScreeningIndex | None:
+        """Return the screening index for the current SDN snapshot, or None when unavailable."""
+        if (
+            (time.time() - self._ofac_cache_fetched_at) >= self.OFAC_CACHE_TTL_SECONDS
+            and not self._recently_failed(("ofac",))
+        ):
+            await self._flights.do("ofac", self.refresh_ofac_snapshot)
+        return self._ofac_index if len(self._ofac_index) else None
+
+    async def warm_ofac_index(self) -> int:
+        index = await self.get_ofac_index()
+        if index is None:
+            raise RuntimeError("OFAC SDN snapshot unavailable; fallback keyword screening active")
+        return len(index)
+
+    def get_ofac_snapshot_info(self) -> dict:
+        return {
+            "entries": len(self._ofac_index),
+            "fetched_at": self._ofac_cache_fetched_at or None,
+            "etag": self._ofac_meta.get("etag"),
+            "last_modified": self._ofac_meta.get("last_modified"),
+            "content_sha256": self._ofac_meta.get("content_sha256"),
+            "path": self._ofac_snapshot_path,
+        }
+
+    def get_screening_data_version(self) -> tuple:
+        """Identify the rules and reference data behind a screening result, for memoization."""
+        return (
+            self._rules.version,
+            self._ofac_meta.get("content_sha256") or self._ofac_cache_fetched_at,
+            self._section_301_cache_fetched_at,
+        )
+
+    def screen_ofac_with_index(self, index: OfacScreeningIndex | None, entity_name: str) -> dict:
+        """Screen one name against a fixed SDN snapshot; safe to call from worker threads."""
         entity_normalized = self._normalize_entity_name(entity_name)
         if not entity_normalized:
             return {
@@ -254,36 +475,33 @@ class LiveDataService:
                 "source": "OFAC SDN",
             }
 
-        entries = await self._get_ofac_entries()
-        if entries:
-            for entry in entries:
-                name = entry["name"]
-                normalized_name = entry["normalized"]
-                ratio = SequenceMatcher(None, entity_normalized, normalized_name).ratio()
-                if (
-                    entity_normalized == normalized_name
-                    or entity_normalized in normalized_name
-                    or normalized_name in entity_normalized
-                    or ratio >= 0.93
-                ):
-                    return {
-                        "entity": entity_name,
-                        "status": "POTENTIAL_MATCH",
-                        "risk": "HIGH",
-                        "message": f"Potential OFAC SDN match: {name}",
-                        "action": "Manual sanctions review required",
-                        "source": "OFAC SDN CSV",
-                    }
+        if index is None or not len(index):
+            return self._fallback_ofac_screen(entity_name)
 
+        candidates = index.search(entity_normalized)
+        if candidates:
+            best = candidates[0]
             return {
                 "entity": entity_name,
-                "status": "CLEAR",
-                "risk": "LOW",
-                "message": "No OFAC SDN matches found",
+                "status": "POTENTIAL_MATCH",
+                "risk": "HIGH",
+                "message": f"Potential OFAC SDN match: {best['name']}",
+                "action": "Manual sanctions review required",
+                "match_score": best["score"],
+                "candidates": candidates,
                 "source": "OFAC SDN CSV",
             }
 
-        return self._fallback_ofac_screen(entity_name)
+        return {
+            "entity": entity_name,
+            "status": "CLEAR",
+            "risk": "LOW",
+            "message": "No OFAC SDN matches found",
+            "source": "OFAC SDN CSV",
+        }
+
+    def normalize_entity_name(self, value: str) -> str:
+        return self._normalize_entity_name(value)
 
     async def get_section_301_status(self, hs_code: str, origin: str) -> dict:
         """Check whether product may be subject to Section 301 tariffs."""
@@ -316,42 +534,86 @@ class LiveDataService:
             "source": "Configured Section 301 rules",
         }
 
+    async def warm_section_301_rates(self) -> int:
+        return len(await self._get_section_301_rates())
+
     async def get_country_geo(self, country_code: str) -> dict | None:
+        """Resolve a country centroid from the in-memory ISO-3166 table; never hits the network."""
         code = (country_code or "").strip().upper()
         if len(code) != 2:
             return None
+        return self._country_geo.get(code)
 
-        cached = self._country_geo_cache.get(code)
-        if cached:
-            return cached
+    def get_singleflight_stats(self) -> dict:
+        return self._flights.stats()
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    self.COUNTRY_GEO_URL.format(code=code),
-                    params={"fields": "cca2,latlng,region,subregion"},
-                    timeout=6.0,
-                )
-                response.raise_for_status()
-                payload = response.json()
-                record = payload[0] if isinstance(payload, list) and payload else payload
-                latlng = record.get("latlng", []) if isinstance(record, dict) else []
-                if not isinstance(latlng, list) or len(latlng) < 2:
-                    return None
-
-                result = {
-                    "code": code,
-                    "lat": float(latlng[0]),
-                    "lon": float(latlng[1]),
-                    "region": str(record.get("region", "")).strip().upper(),
-                    "subregion": str(record.get("subregion", "")).strip().upper(),
-                    "source": "restcountries",
-                }
-                self._country_geo_cache[code] = result
-                return result
-            except Exception as exc:
-                logger.warning("Country geo lookup failed for %s: %s", code, exc)
-                return None
+    def get_negative_cache_stats(self) -> dict:
+        now = time.monotonic()
+        active = [key for key, retry_at in self._negative_cache.items() if retry_at > now]
+        return {
+            "ttl_seconds": self._negative_cache_ttl(),
+            "active": len(active),
+            "sources": sorted({str(key[0]) for key in active}),
+        }
+
+    def _recently_failed(self, key: tuple) -> bool:
+        retry_at = self._negative_cache.get(key)
+        if retry_at is None:
+            return False
+        if retry_at > time.monotonic():
+            return True
+        del self._negative_cache[key]
+        return False
+
+    def _remember_failure(self, key: tuple) -> None:
+        self._negative_cache[key] = time.monotonic() + self._negative_cache_ttl()
+        if len(self._negative_cache) > 4096:
+            now = time.monotonic()
+            self._negative_cache = {k: v for k, v in self._negative_cache.items() if v > now}
+
+    def _negative_cache_ttl(self) -> float:
+        return self._negative_cache_seconds
+
+    def get_country_geo_stats(self) -> dict:
+        return self._country_geo.stats()
+
+    async def refresh_country_geo(self) -> int:
+        """Pull the full restcountries list and merge it into the persisted overlay."""
+        return await self._flights.do("country_geo", self._fetch_country_geo)
+
+    async def _fetch_country_geo(self) -> int:
+        response = await upstream_http.get(
+            self.COUNTRY_GEO_URL,
+            params={"fields": "cca2,latlng,region,subregion"},
+            timeout=20.0,
+        )
+        response.raise_for_status()
+        payload = response.json()
+        if not isinstance(payload, list):
+            raise ValueError("Unexpected restcountries payload")
+        fetched_at = time.time()
+        changed = await asyncio.to_thread(self._country_geo.apply_restcountries, payload, fetched_at)
+        await shared_cache.set("country_geo", "restcountries", {"records": payload, "fetched_at": fetched_at})
+        return changed
+
+    async def _on_shared_country_geo_update(self, key: str | None) -> None:
+        shared = await shared_cache.get("country_geo", "restcountries")
+        if not isinstance(shared, dict) or not isinstance(shared.get("records"), list):
+            return
+        fetched_at = float(shared.get("fetched_at") or 0)
+        if fetched_at > (self._country_geo.refreshed_at or 0.0):
+            await asyncio.to_thread(self._country_geo.apply_restcountries, shared["records"], fetched_at)
+
+    async def warm_country_geo(self) -> str:
+        """Optional restcountries refresh of the geo table; disabled unless COUNTRY_GEO_REFRESH is set."""
+        if os.getenv("COUNTRY_GEO_REFRESH", "false").strip().lower() not in {"1", "true", "yes", "on"}:
+            return "disabled"
+        max_age = env_float("COUNTRY_GEO_REFRESH_INTERVAL_SECONDS", 604800.0, minimum=3600.0)
+
+        if (time.time() - (self._country_geo.refreshed_at or 0.0)) < max_age:
+            return "fresh"
+        changed = await self.refresh_country_geo()
+        return f"{changed} rows changed"
 
     async def get_country_route_risk(self, origin_country: str, destination_country: str) -> dict:
         origin = self._normalize_country_code(origin_country)
@@ -378,82 +640,10 @@ class LiveDataService:
         if live_risk is not None:
             return live_risk
 
-        blocked_pairs = self._country_route_rules.get("blocked_pairs", [])
-        for item in blocked_pairs:
-            if not isinstance(item, dict):
-                continue
-            item_origin = self._normalize_country_code(item.get("origin", ""))
-            item_destination = self._normalize_country_code(item.get("destination", ""))
-            if item_origin == origin and item_destination == destination:
-                penalty = self._safe_int(item.get("score_penalty"), default=85)
-                return {
-                    "status": "BLOCKED",
-                    "score_penalty": max(60, penalty),
-                    "details": str(
-                        item.get(
-                            "reason",
-                            f"Trade lane {origin}->{destination} is highly restricted",
-                        )
-                    ),
-                    "action_required": str(
-                        item.get("action_required", "Escalate to legal/compliance before shipment")
-                    ),
-                    "source": str(
-                        item.get("source", "Configured sanctions and geopolitics restrictions")
-                    ),
-                }
-
-        high_risk_pairs = self._country_route_rules.get("high_risk_pairs", [])
-        for item in high_risk_pairs:
-            if not isinstance(item, dict):
-                continue
-            item_origin = self._normalize_country_code(item.get("origin", ""))
-            item_destination = self._normalize_country_code(item.get("destination", ""))
-            if item_origin == origin and item_destination == destination:
-                penalty = self._safe_int(item.get("score_penalty"), default=35)
-                return {
-                    "status": "WARNING",
-                    "score_penalty": max(20, penalty),
-                    "details": str(
-                        item.get(
-                            "reason",
-                            f"Trade lane {origin}->{destination} has elevated regulatory and sanctions risk",
-                        )
-                    ),
-                    "action_required": str(
-                        item.get(
-                            "action_required",
-                            "Perform enhanced denied-party and licensing checks",
-                        )
-                    ),
-                    "source": str(
-                        item.get("source", "Configured sanctions and geopolitics restrictions")
-                    ),
-                }
-
-        watchlist = self._country_route_rules.get("watchlist_countries", {})
-        watchlist_penalties = self._country_route_rules.get("watchlist_penalties", {})
-        if isinstance(watchlist, dict):
-            origin_level = str(watchlist.get(origin, "")).strip().lower()
-            destination_level = str(watchlist.get(destination, "")).strip().lower()
-            penalty = 0
-
-            if origin_level:
-                penalty += self._safe_int(watchlist_penalties.get(origin_level), default=10)
-            if destination_level:
-                penalty += self._safe_int(watchlist_penalties.get(destination_level), default=10)
-
-            if penalty > 0:
-                return {
-                    "status": "WARNING",
-                    "score_penalty": min(45, penalty),
-                    "details": (
-                        f"Lane involves watchlist country risk (origin={origin_level or 'low'}, "
-                        f"destination={destination_level or 'low'})"
-                    ),
-                    "action_required": "Run enhanced documentary and licensing review",
-                    "source": "Configured sanctions and geopolitics restrictions",
-                }
+        rules = self._rules
+        verdict = rules.lane_verdict(origin, destination) or rules.watchlist_verdict(origin, destination)
+        if verdict is not None:
+            return verdict
 
         return {
             "status": "CLEAR",
@@ -462,27 +652,131 @@ class LiveDataService:
             "source": "Configured sanctions and geopolitics restrictions",
         }
 
-    async def _get_ofac_entries(self) -> list[dict]:
-        now = time.time()
-        if self._ofac_entries_cache and (now - self._ofac_cache_fetched_at) < self.OFAC_CACHE_TTL_SECONDS:
-            return self._ofac_entries_cache
+    async def refresh_ofac_snapshot(self) -> None:
+        """Conditionally re-download the SDN list; parse and persist it off the event loop."""
+        async with self._ofac_refresh_lock:
+            if (time.time() - self._ofac_cache_fetched_at) < self.OFAC_CACHE_TTL_SECONDS:
+                return
+            if await self._adopt_shared_ofac_snapshot():
+                return
+
+            headers = {}
+            if len(self._ofac_index):
+                if self._ofac_meta.get("etag"):
+                    headers["If-None-Match"] = self._ofac_meta["etag"]
+                if self._ofac_meta.get("last_modified"):
+                    headers["If-Modified-Since"] = self._ofac_meta["last_modified"]
 
-        async with httpx.AsyncClient() as client:
             try:
-                response = await client.get(
+                response = await upstream_http.get(
                     self.OFAC_SDN_URL,
+                    headers=headers,
                     timeout=20.0,
                     follow_redirects=True,
                 )
+                if response.status_code == 304:
+                    self._ofac_meta = {**self._ofac_meta, "fetched_at": time.time()}
+                    self._ofac_cache_fetched_at = self._ofac_meta["fetched_at"]
+                    await self._publish_ofac_snapshot()
+                    return
                 response.raise_for_status()
-                entries = self._parse_ofac_csv(response.text)
-                if entries:
-                    self._ofac_entries_cache = entries
-                    self._ofac_cache_fetched_at = now
-                return self._ofac_entries_cache
             except Exception as exc:
                 logger.warning("OFAC CSV fetch failed: %s", exc)
-                return self._ofac_entries_cache
+                self._remember_failure(("ofac",))
+                return
+
+            meta = {
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "content_sha256": hashlib.sha256(response.content).hexdigest(),
+                "fetched_at": time.time(),
+            }
+            if len(self._ofac_index) and meta["content_sha256"] == self._ofac_meta.get("content_sha256"):
+                self._ofac_meta = meta
+                self._ofac_cache_fetched_at = meta["fetched_at"]
+                await self._publish_ofac_snapshot()
+                return
+
+            try:
+                index = await asyncio.to_thread(self._build_ofac_snapshot, response.content, meta)
+            except Exception as exc:
+                logger.warning("OFAC snapshot build failed: %s", exc)
+                return
+            if index is None:
+                return
+
+            # Readers always see either the previous or the new snapshot, never a partial one.
+            self._ofac_index = index
+            self._ofac_meta = meta
+            self._ofac_cache_fetched_at = meta["fetched_at"]
+            await self._publish_ofac_snapshot()
+
+    async def _publish_ofac_snapshot(self) -> None:
+        if len(self._ofac_index):
+            await shared_cache.set("ofac", "sdn", {"meta": self._ofac_meta, "names": self._ofac_index.names})
+
+    async def _adopt_shared_ofac_snapshot(self) -> bool:
+        """Use the SDN snapshot another worker already fetched when it is still fresh."""
+        shared = await shared_cache.get("ofac", "sdn")
+        if not isinstance(shared, dict) or not shared.get("names"):
+            return False
+        meta = dict(shared.get("meta") or {})
+        fetched_at = float(meta.get("fetched_at") or 0)
+        if (time.time() - fetched_at) >= self.OFAC_CACHE_TTL_SECONDS:
+            return False
+
+        if not len(self._ofac_index) or meta.get("content_sha256") != self._ofac_meta.get("content_sha256"):
+            try:
+                index = await asyncio.to_thread(self._index_ofac_names, shared["names"], meta)
+            except Exception as exc:
+                logger.warning("Shared OFAC snapshot could not be indexed: %s", exc)
+                return False
+            if index is None:
+                return False
+            self._ofac_index = index
+        self._ofac_meta = meta
+        self._ofac_cache_fetched_at = fetched_at
+        return True
+
+    def _on_shared_ofac_update(self, key: str | None) -> None:
+        self._ofac_cache_fetched_at = 0.0
+        self._spawn(self._flights.do("ofac", self.refresh_ofac_snapshot))
+
+    def _build_ofac_snapshot(self, content: bytes, meta: dict) -> OfacScreeningIndex | None:
+        return self._index_ofac_entries(self._parse_ofac_csv(content.decode("utf-8", errors="replace")), meta)
+
+    def _index_ofac_names(self, names: list[str], meta: dict) -> OfacScreeningIndex | None:
+        entries = []
+        seen = set()
+        for name in names:
+            normalized = self._normalize_entity_name(name)
+            if not normalized or normalized in seen:
+                continue
+            seen.add(normalized)
+            entries.append({"name": name, "normalized": normalized})
+        return self._index_ofac_entries(entries, meta)
+
+    def _index_ofac_entries(self, entries: list[dict], meta: dict) -> OfacScreeningIndex | None:
+        if not entries:
+            return None
+        index = OfacScreeningIndex(entries)
+        try:
+            index.save(self._ofac_snapshot_path, meta)
+        except OSError as exc:
+            logger.warning("OFAC snapshot could not be persisted (%s): %s", self._ofac_snapshot_path, exc)
+        return index
+
+    def _load_ofac_snapshot(self) -> None:
+        loaded = OfacScreeningIndex.load(self._ofac_snapshot_path)
+        if loaded is None:
+            return
+        index, meta = loaded
+        if not len(index):
+            return
+        self._ofac_index = index
+        self._ofac_meta = meta
+        self._ofac_cache_fetched_at = float(meta.get("fetched_at", 0) or 0)
+        logger.info("Loaded OFAC snapshot with %d entries", len(index))
 
     async def _get_section_301_rates(self) -> dict:
         now = time.time()
@@ -496,70 +790,98 @@ class LiveDataService:
         if not rules_url:
             return self._section_301_rates_cache
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(rules_url, timeout=10.0)
-                response.raise_for_status()
-                payload = response.json()
-                if isinstance(payload, dict) and "section_301_rates_by_hs4" in payload:
-                    payload = payload["section_301_rates_by_hs4"]
-                if isinstance(payload, dict):
-                    parsed = {}
-                    for key, value in payload.items():
-                        hs_prefix = re.sub(r"[^0-9]", "", str(key))[:4]
-                        if len(hs_prefix) != 4:
-                            continue
-                        try:
-                            parsed[hs_prefix] = float(value)
-                        except Exception:
-                            continue
-
-                    if parsed:
-                        self._section_301_rates_cache = parsed
-                        self._section_301_cache_fetched_at = now
-            except Exception as exc:
-                logger.warning("Live Section 301 rules fetch failed: %s", exc)
+        shared = await shared_cache.get("section_301", "rates")
+        if isinstance(shared, dict) and shared.get("rates"):
+            fetched_at = float(shared.get("fetched_at") or 0)
+            if (now - fetched_at) < self.SECTION_301_CACHE_TTL_SECONDS:
+                self._section_301_rates_cache = shared["rates"]
+                self._section_301_cache_fetched_at = fetched_at
+                return self._section_301_rates_cache
+
+        if self._recently_failed(("section_301", rules_url)):
+            return self._section_301_rates_cache
+        return await self._flights.do(("section_301", rules_url), lambda: self._fetch_section_301_rates(rules_url))
+
+    async def _fetch_section_301_rates(self, rules_url: str) -> dict:
+        try:
+            response = await upstream_http.get(rules_url, timeout=10.0)
+            response.raise_for_status()
+            payload = response.json()
+            if isinstance(payload, dict) and "section_301_rates_by_hs4" in payload:
+                payload = payload["section_301_rates_by_hs4"]
+            if isinstance(payload, dict):
+                parsed = {}
+                for key, value in payload.items():
+                    hs_prefix = re.sub(r"[^0-9]", "", str(key))[:4]
+                    if len(hs_prefix) != 4:
+                        continue
+                    try:
+                        parsed[hs_prefix] = float(value)
+                    except Exception:
+                        continue
+
+                if parsed:
+                    now = time.time()
+                    self._section_301_rates_cache = parsed
+                    self._section_301_cache_fetched_at = now
+                    await shared_cache.set("section_301", "rates", {"rates": parsed, "fetched_at": now})
+        except Exception as exc:
+            logger.warning("Live Section 301 rules fetch failed: %s", exc)
+            self._remember_failure(("section_301", rules_url))
 
         return self._section_301_rates_cache
 
+    def _on_shared_section_301_update(self, key: str | None) -> None:
+        # The next lookup re-reads the shared copy before considering the upstream.
+        self._section_301_cache_fetched_at = 0.0
+
     async def _get_live_country_route_risk(self, origin: str, destination: str) -> dict | None:
         risk_url = os.getenv("COUNTRY_ROUTE_RISK_URL", "").strip()
         if not risk_url:
             return None
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    risk_url,
-                    params={"origin": origin, "destination": destination},
-                    timeout=8.0,
-                    follow_redirects=True,
-                )
-                response.raise_for_status()
-                payload = response.json()
-                if not isinstance(payload, dict):
-                    return None
-
-                status = str(payload.get("status", "WARNING")).strip().upper()
-                if status not in {"CLEAR", "WARNING", "BLOCKED"}:
-                    status = "WARNING"
+        if self._recently_failed(("route_risk", origin, destination)):
+            return None
+        result = await self._flights.do(
+            ("route_risk", origin, destination),
+            lambda: self._fetch_live_country_route_risk(risk_url, origin, destination),
+        )
+        return dict(result) if result is not None else None
 
-                return {
-                    "status": status,
-                    "score_penalty": self._safe_int(payload.get("score_penalty"), default=20),
-                    "details": str(
-                        payload.get(
-                            "details",
-                            f"Live lane risk signal for {origin}->{destination}",
-                        )
-                    ),
-                    "action_required": str(payload.get("action_required", "Review route compliance")),
-                    "source": str(payload.get("source", "Live country route risk API")),
-                }
-            except Exception as exc:
-                logger.warning("Live country route risk fetch failed: %s", exc)
+    async def _fetch_live_country_route_risk(self, risk_url: str, origin: str, destination: str) -> dict | None:
+        try:
+            response = await upstream_http.get(
+                risk_url,
+                params={"origin": origin, "destination": destination},
+                timeout=8.0,
+                follow_redirects=True,
+            )
+            response.raise_for_status()
+            payload = response.json()
+            if not isinstance(payload, dict):
                 return None
 
+            status = str(payload.get("status", "WARNING")).strip().upper()
+            if status not in {"CLEAR", "WARNING", "BLOCKED"}:
+                status = "WARNING"
+
+            return {
+                "status": status,
+                "score_penalty": self._safe_int(payload.get("score_penalty"), default=20),
+                "details": str(
+                    payload.get(
+                        "details",
+                        f"Live lane risk signal for {origin}->{destination}",
+                    )
+                ),
+                "action_required": str(payload.get("action_required", "Review route compliance")),
+                "source": str(payload.get("source", "Live country route risk API")),
+            }
+        except Exception as exc:
+            logger.warning("Live country route risk fetch failed: %s", exc)
+            self._remember_failure(("route_risk", origin, destination))
+            return None
+
     def _parse_ofac_csv(self, csv_text: str) -> list[dict]:
         entries = []
         seen = set()
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import math
+import time
+from functools import partial
+from typing import Iterable, Optional
+
+from ..core.cache import shared_cache
+from ..core.config import env_float, env_int
+from ..core.http_client import upstream_http
+from ..core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+Tile = tuple[int, int]
+
+
+class MarineWeatherCache:
+    """Open-Meteo current conditions cached per geo tile and time bucket.
+
+    Positions are snapped to a ``tile_degrees`` grid and conditions are fetched
+    for the tile centre, so every vessel in a tile shares one entry until the
+    ``bucket_seconds`` window rolls over. Entries live in the shared tiered
+    cache; concurrent misses for a tile are coalesced, and ``prefetch`` loads
+    many tiles with one multi-coordinate request. Failed lookups are cached
+    briefly as empty entries so an outage does not turn into a request storm.
+    """
+
+    WEATHER_URL = "https://api.open-meteo.com/v1/forecast"
+    CURRENT_FIELDS = "wind_speed_10m,wind_direction_10m,wave_height"
+    MAX_BATCH_TILES = 100
+    MISS_TTL_SECONDS = 60
+
+    def __init__(self) -> None:
+        self.tile_degrees = env_float("WEATHER_TILE_DEGREES", 0.5, minimum=0.01)
+        self.bucket_seconds = env_int("WEATHER_BUCKET_SECONDS", 1800, minimum=60)
+        # How long a tracking request waits on a cold tile before answering without weather.
+        self.wait_seconds = env_float("WEATHER_WAIT_SECONDS", 1.5)
+        self._flights = SingleFlight()
+        self._stats = {
+            "upstream_calls": 0,
+            "tiles_fetched": 0,
+            "prefetched_tiles": 0,
+            "failures": 0,
+            "wait_timeouts": 0,
+        }
+
+    def tile(self, lat: float, lon: float) -> Tile:
+        return math.floor(lat / self.tile_degrees), math.floor(lon / self.tile_degrees)
+
+    def tile_center(self, tile: Tile) -> tuple[float, float]:
+        return (
+            round((tile[0] + 0.5) * self.tile_degrees, 4),
+            round((tile[1] + 0.5) * self.tile_degrees, 4),
+        )
+
+    async def get_snapshot(self, lat: float, lon: float) -> Optional[dict]:
+        """Return conditions for the tile containing (lat, lon), or None when unavailable."""
+        tile = self.tile(lat, lon)
+        bucket = self._bucket()
+        key = self._cache_key(tile, bucket)
+        cached = await shared_cache.get("weather", key)
+        if cached is not None:
+            return cached or None
+
+        load = self._flights.do(("weather", key), partial(self._load_tile, tile, bucket))
+        try:
+            return await asyncio.wait_for(load, timeout=self.wait_seconds)
+        except asyncio.TimeoutError:
+            # The shielded fetch keeps running and fills the cache for the next poll.
+            self._stats["wait_timeouts"] += 1
+            return None
+
+    async def prefetch(self, points: Iterable[tuple[float, float]]) -> int:
+        """Warm every tile touched by ``points`` that is not cached yet; returns tiles fetched."""
+        bucket = self._bucket()
+        missing: list[Tile] = []
+        for tile in dict.fromkeys(self.tile(lat, lon) for lat, lon in points):
+            key = self._cache_key(tile, bucket)
+            if self._flights.in_flight(("weather", key)):
+                continue
+            if await shared_cache.get("weather", key) is None:
+                missing.append(tile)
+
+        for offset in range(0, len(missing), self.MAX_BATCH_TILES):
+            chunk = missing[offset:offset + self.MAX_BATCH_TILES]
+            batch = asyncio.ensure_future(self._fetch_tiles(chunk, bucket))
+            # Register each tile as in flight so concurrent get_snapshot calls wait on the batch.
+            await asyncio.gather(
+                *(
+                    self._flights.do(
+                        ("weather", self._cache_key(tile, bucket)),
+                        partial(self._from_batch, batch, tile),
+                    )
+                    for tile in chunk
+                )
+            )
+            self._stats["prefetched_tiles"] += len(chunk)
+        return len(missing)
+
+    def stats(self) -> dict:
+        return {
+            "tile_degrees": self.tile_degrees,
+            "bucket_seconds": self.bucket_seconds,
+            **self._stats,
+            "coalescing": self._flights.stats(),
+        }
+
+    async def _load_tile(self, tile: Tile, bucket: int) -> Optional[dict]:
+        return (await self._fetch_tiles([tile], bucket)).get(tile)
+
+    async def _from_batch(self, batch: asyncio.Future, tile: Tile) -> Optional[dict]:
+        return (await batch).get(tile)
+
+    async def _fetch_tiles(self, tiles: list[Tile], bucket: int) -> dict[Tile, Optional[dict]]:
+        centers = [self.tile_center(tile) for tile in tiles]
+        params = {
+            "latitude": ",".join(str(lat) for lat, _ in centers),
+            "longitude": ",".join(str(lon) for _, lon in centers),
+            "current": self.CURRENT_FIELDS,
+        }
+
+        self._stats["upstream_calls"] += 1
+        try:
+            response = await upstream_http.get(self.WEATHER_URL, params=params)
+            response.raise_for_status()
+            payload = response.json()
+        except Exception as exc:
+            self._stats["failures"] += 1
+            logger.warning("Marine weather fetch for %d tiles failed: %s", len(tiles), exc)
+            payload = None
+
+        # A single coordinate returns one object, several return a list in request order.
+        items = payload if isinstance(payload, list) else [payload]
+        results: dict[Tile, Optional[dict]] = {}
+        for index, tile in enumerate(tiles):
+            item = items[index] if index < len(items) else None
+            snapshot = self._parse_current(item)
+            results[tile] = snapshot
+            if snapshot is not None:
+                self._stats["tiles_fetched"] += 1
+            await shared_cache.set(
+                "weather",
+                self._cache_key(tile, bucket),
+                snapshot or {},
+                ttl=self._remaining_ttl(bucket) if snapshot is not None else self.MISS_TTL_SECONDS,
+            )
+        return results
+
+    def _parse_current(self, payload) -> Optional[dict]:
+        current = payload.get("current", {}) if isinstance(payload, dict) else {}
+        if not isinstance(current, dict):
+            return None
+
+        wind_speed = current.get("wind_speed_10m")
+        wave_height = current.get("wave_height")
+        if wind_speed is None and wave_height is None:
+            return None
+
+        return {
+            "wind_speed_10m": float(wind_speed) if wind_speed is not None else None,
+            "wave_height": float(wave_height) if wave_height is not None else None,
+            "wind_direction_10m": int(float(current.get("wind_direction_10m") or 0)),
+        }
+
+    def _bucket(self) -> int:
+        return int(time.time() // self.bucket_seconds)
+
+    def _remaining_ttl(self, bucket: int) -> int:
+        return max(1, int((bucket + 1) * self.bucket_seconds - time.time()))
+
+    def _cache_key(self, tile: Tile, bucket: int) -> str:
+        return f"{self.tile_degrees:g}:{tile[0]}:{tile[1]}:{bucket}"
+
+
+marine_weather = MarineWeatherCache()
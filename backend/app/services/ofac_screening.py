@@ -0,0 +1,224 @@
+import json
+import os
+from difflib import SequenceMatcher
+from typing import Optional
+
+import numpy as np
+
+
+class OfacScreeningIndex:
+    """Character-trigram inverted index over normalized OFAC SDN names.
+
+    Matching semantics follow the original linear scan: a name is a potential
+    match when it equals the query, either string contains the other, or the
+    SequenceMatcher ratio reaches MATCH_RATIO. Trigram postings block the
+    candidate set, NumPy scores it, and only the top candidates are verified
+    with the exact string checks.
+    """
+
+    MATCH_RATIO = 0.93
+    FUZZY_DICE_FLOOR = 0.5
+    FUZZY_CANDIDATES = 64
+
+    def __init__(self, entries: list[dict]) -> None:
+        self.names = [entry["name"] for entry in entries]
+        self.normalized = [entry["normalized"] for entry in entries]
+
+        postings: dict[str, list[int]] = {}
+        gram_counts = np.zeros(len(entries), dtype=np.int32)
+        short_indices = []
+        for idx, value in enumerate(self.normalized):
+            grams = self._trigrams(value)
+            if not grams:
+                short_indices.append(idx)
+                continue
+            gram_counts[idx] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(idx)
+
+        self._gram_ids = {gram: gram_id for gram_id, gram in enumerate(postings)}
+        offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+        if postings:
+            offsets[1:] = np.cumsum([len(items) for items in postings.values()])
+            flat = np.fromiter(
+                (idx for items in postings.values() for idx in items),
+                dtype=np.int32,
+                count=int(offsets[-1]),
+            )
+        else:
+            flat = np.zeros(0, dtype=np.int32)
+
+        self._offsets = offsets
+        self._postings = flat
+        self._gram_counts = gram_counts
+        self._lengths = np.array([len(value) for value in self.normalized], dtype=np.int32)
+        self._char_counts = np.zeros((len(entries), 128), dtype=np.uint8)
+        for idx, value in enumerate(self.normalized):
+            self._char_counts[idx] = self._char_histogram(value)
+        self._short_indices = short_indices
+
+    def __len__(self) -> int:
+        return len(self.normalized)
+
+    def save(self, path: str, meta: dict) -> None:
+        """Persist names, postings and metadata as one .npz file, replaced atomically."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as handle:
+            np.savez(
+                handle,
+                names=self._pack(self.names),
+                normalized=self._pack(self.normalized),
+                grams=np.frombuffer("".join(self._gram_ids).encode("ascii"), dtype=np.uint8),
+                offsets=self._offsets,
+                postings=self._postings,
+                gram_counts=self._gram_counts,
+                char_counts=self._char_counts,
+                meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional[tuple["OfacScreeningIndex", dict]]:
+        """Load a snapshot written by save(); returns None when missing or unreadable."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                index = cls.__new__(cls)
+                index.names = cls._unpack(data["names"])
+                index.normalized = cls._unpack(data["normalized"])
+                grams = data["grams"].tobytes().decode("ascii")
+                index._gram_ids = {
+                    grams[pos:pos + 3]: gram_id for gram_id, pos in enumerate(range(0, len(grams), 3))
+                }
+                index._offsets = data["offsets"]
+                index._postings = data["postings"]
+                index._gram_counts = data["gram_counts"]
+                index._char_counts = data["char_counts"]
+                meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+        except Exception:
+            return None
+
+        index._lengths = np.array([len(value) for value in index.normalized], dtype=np.int32)
+        index._short_indices = [
+            idx for idx, count in enumerate(index._gram_counts.tolist()) if count == 0
+        ]
+        return index, meta
+
+    def search(self, query: str, limit: int = 5) -> list[dict]:
+        """Return verified matches for an already-normalized name, best first."""
+        if not query or not self.normalized:
+            return []
+
+        matches = []
+        for idx in self._candidates(query):
+            match_type = self._match_type(query, self.normalized[idx])
+            if match_type is None:
+                continue
+            matches.append((idx, match_type))
+            if len(matches) >= limit:
+                break
+
+        results = []
+        for idx, match_type in matches:
+            score = 1.0 if match_type == "exact" else SequenceMatcher(
+                None, query, self.normalized[idx]
+            ).ratio()
+            results.append(
+                {
+                    "name": self.names[idx],
+                    "score": round(score, 4),
+                    "match_type": match_type,
+                }
+            )
+        results.sort(key=lambda item: item["score"], reverse=True)
+        return results
+
+    def _candidates(self, query: str) -> list[int]:
+        grams = self._trigrams(query)
+        if not grams:
+            # Too short for trigram blocking; fall back to a plain substring scan.
+            return [
+                idx
+                for idx, value in enumerate(self.normalized)
+                if query in value or value in query
+            ]
+
+        gram_ids = [self._gram_ids[gram] for gram in grams if gram in self._gram_ids]
+        if gram_ids:
+            hits = np.concatenate(
+                [self._postings[self._offsets[gid]:self._offsets[gid + 1]] for gid in gram_ids]
+            )
+            shared = np.bincount(hits, minlength=len(self.normalized))
+        else:
+            shared = np.zeros(len(self.normalized), dtype=np.int64)
+
+        # Every match shares at least one trigram with the query, so only
+        # entries present in the postings need scoring.
+        touched = np.flatnonzero(shared)
+        shared = shared[touched]
+        gram_counts = self._gram_counts[touched]
+        lengths = self._lengths[touched]
+        query_size = len(grams)
+        dice = (2.0 * shared) / (query_size + gram_counts)
+
+        mask = shared == gram_counts
+        if len(gram_ids) == query_size:
+            mask |= shared == query_size
+
+        # SequenceMatcher.ratio() can never exceed 2 * min(len) / (len_a + len_b).
+        query_length = len(query)
+        length_bound = (2.0 * np.minimum(lengths, query_length)) / (lengths + query_length)
+        fuzzy = np.flatnonzero(
+            (length_bound >= self.MATCH_RATIO) & (dice >= self.FUZZY_DICE_FLOOR) & ~mask
+        )
+        if fuzzy.size:
+            # Vectorized SequenceMatcher.quick_ratio(): shared character multiset.
+            common = np.minimum(
+                self._char_counts[touched[fuzzy]], self._char_histogram(query)
+            ).sum(axis=1)
+            quick = (2.0 * common) / (lengths[fuzzy] + query_length)
+            fuzzy = fuzzy[quick >= self.MATCH_RATIO]
+        if fuzzy.size > self.FUZZY_CANDIDATES:
+            top = np.argpartition(dice[fuzzy], -self.FUZZY_CANDIDATES)[-self.FUZZY_CANDIDATES:]
+            fuzzy = fuzzy[top]
+        mask[fuzzy] = True
+
+        candidates = np.flatnonzero(mask)
+        ordered = touched[candidates[np.argsort(-dice[candidates], kind="stable")]].tolist()
+        ordered.extend(idx for idx in self._short_indices if self.normalized[idx] in query)
+        return ordered
+
+    def _match_type(self, query: str, value: str) -> str | None:
+        if query == value:
+            return "exact"
+        if query in value:
+            return "contains_query"
+        if value in query:
+            return "contained_in_query"
+        matcher = SequenceMatcher(None, query, value)
+        if (
+            matcher.real_quick_ratio() >= self.MATCH_RATIO
+            and matcher.quick_ratio() >= self.MATCH_RATIO
+            and matcher.ratio() >= self.MATCH_RATIO
+        ):
+            return "fuzzy"
+        return None
+
+    @staticmethod
+    def _pack(values: list[str]) -> np.ndarray:
+        joined = "\x1f".join(value.replace("\x1f", " ") for value in values)
+        return np.frombuffer(joined.encode("utf-8"), dtype=np.uint8)
+
+    @staticmethod
+    def _unpack(blob: np.ndarray) -> list[str]:
+        text = blob.tobytes().decode("utf-8")
+        return text.split("\x1f") if text else []
+
+    def _char_histogram(self, value: str) -> np.ndarray:
+        codes = np.frombuffer(value.encode("ascii", "ignore"), dtype=np.uint8)
+        return np.minimum(np.bincount(codes, minlength=128)[:128], 255).astype(np.uint8)
+
+    def _trigrams(self, value: str) -> set[str]:
+        return {value[idx:idx + 3] for idx in range(len(value) - 2)}
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator, Optional
+
+from ..core.config import env_float, env_int
+from .cargo_service import CargoTrackingResult, cargo_service
+
+logger = logging.getLogger(__name__)
+
+
+class TrackingSubscription:
+    """One subscriber's bounded mailbox; a full queue drops its oldest update."""
+
+    def __init__(self, container_id: str, max_queue: int) -> None:
+        self.container_id = container_id
+        self.dropped = 0
+        self._queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=max_queue)
+
+    def offer(self, message: dict) -> None:
+        # Updates are full snapshots, so a slow client only ever needs the newest ones.
+        if self._queue.full():
+            with suppress(asyncio.QueueEmpty):
+                self._queue.get_nowait()
+                self.dropped += 1
+        self._queue.put_nowait(message)
+
+    async def get(self) -> dict:
+        return await self._queue.get()
+
+
+class _ContainerChannel:
+    def __init__(self, container_id: str) -> None:
+        self.container_id = container_id
+        self.subscribers: set[TrackingSubscription] = set()
+        self.task: Optional[asyncio.Task] = None
+        self.last_message: Optional[dict] = None
+        self.ticks = 0
+        self.errors = 0
+
+
+class TrackingHub:
+    """Fan out live tracking updates so each watched container is computed once per tick.
+
+    The first subscriber for a container starts its producer task; every tick the
+    producer runs ``track_shipment`` once and offers the update to all subscriber
+    queues. New subscribers get the latest update immediately. The producer is
+    cancelled when the last subscriber leaves.
+    """
+
+    def __init__(self) -> None:
+        self.interval = env_float("TRACKING_TICK_SECONDS", 10.0, minimum=0.5)
+        self.max_queue = env_int("TRACKING_QUEUE_SIZE", 4, minimum=1)
+        self._channels: dict[str, _ContainerChannel] = {}
+
+    @asynccontextmanager
+    async def subscribe(self, container_id: str) -> AsyncIterator[TrackingSubscription]:
+        container = cargo_service.normalize_container_id(container_id)
+        channel = self._channels.get(container)
+        if channel is None:
+            channel = _ContainerChannel(container)
+            self._channels[container] = channel
+            channel.task = asyncio.create_task(self._produce(channel), name=f"tracking:{container}")
+
+        subscription = TrackingSubscription(container, self.max_queue)
+        channel.subscribers.add(subscription)
+        if channel.last_message is not None:
+            subscription.offer(channel.last_message)
+        try:
+            yield subscription
+        finally:
+            channel.subscribers.discard(subscription)
+            if not channel.subscribers and self._channels.get(container) is channel:
+                del self._channels[container]
+                channel.task.cancel()
+
+    async def close(self) -> None:
+        channels, self._channels = list(self._channels.values()), {}
+        for channel in channels:
+            channel.task.cancel()
+        await asyncio.gather(*(channel.task for channel in channels), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "tick_seconds": self.interval,
+            "max_queue": self.max_queue,
+            "containers": {
+                container: {
+                    "subscribers": len(channel.subscribers),
+                    "ticks": channel.ticks,
+                    "errors": channel.errors,
+                    "dropped": sum(item.dropped for item in channel.subscribers),
+                }
+                for container, channel in self._channels.items()
+            },
+        }
+
+    async def _produce(self, channel: _ContainerChannel) -> None:
+        while True:
+            channel.ticks += 1
+            try:
+                result = await cargo_service.track_shipment(channel.container_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                channel.errors += 1
+                logger.warning("Tracking update for %s failed: %s", channel.container_id, exc)
+                result = None
+
+            if result is not None:
+                message = self._position_message(result)
+                channel.last_message = message
+                for subscription in list(channel.subscribers):
+                    subscription.offer(message)
+
+            await asyncio.sleep(self.interval)
+
+    def _position_message(self, result: CargoTrackingResult) -> dict:
+        return {
+            "type": "position_update",
+            "data": {
+                "container_id": result.shipment.container_id,
+                "latitude": result.current_position.latitude,
+                "longitude": result.current_position.longitude,
+                "location_name": result.current_position.location_name,
+                "speed_knots": result.current_position.speed_knots,
+                "heading": result.current_position.heading,
+                "progress_percent": result.progress_percent,
+                "eta": result.shipment.eta.isoformat(),
+                "timestamp": result.current_position.timestamp.isoformat(),
+            },
+        }
+
+
+tracking_hub = TrackingHub()
@@ -0,0 +1,48 @@
+"""
+Bulk-load a USITC HTS release into the local tariff index.
+
+Usage (from backend/):
+    python -m scripts.load_hts_release hts_2026_revision_1.json --release 2026-R1
+    python -m scripts.load_hts_release hts_export.csv
+    python -m scripts.load_hts_release --from-usitc
+
+The index file defaults to app/data/cache/hts_index.sqlite and can be moved
+with HTS_INDEX_FILE / LIVE_DATA_CACHE_DIR, exactly as the API process resolves it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.live_data_service import live_data_service  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load an HTS release into the local index")
+    parser.add_argument("export_file", nargs="?", help="USITC JSON or CSV export")
+    parser.add_argument("--release", help="Release label stored with the index")
+    parser.add_argument("--from-usitc", action="store_true", help="Download the current release")
+    args = parser.parse_args()
+
+    if args.from_usitc:
+        stats = asyncio.run(live_data_service.refresh_hts_release(args.release))
+    elif args.export_file:
+        with open(args.export_file, "rb") as handle:
+            payload = handle.read()
+        release = args.release or os.path.splitext(os.path.basename(args.export_file))[0]
+        stats = live_data_service.load_hts_release(payload, release)
+    else:
+        parser.error("provide an export file or --from-usitc")
+        return 2
+
+    print(f"Indexed {stats['rows']} rows for release {stats['release']} -> {stats['path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())